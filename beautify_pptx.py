@@ -2,14 +2,22 @@
 # -*- coding: utf-8 -*-
 """
 Beautify the block_lecture.pptx using templates.
-This script applies template designs to the existing presentation.
+The source deck is read once into a plain intermediate form (per slide its
+title and paragraphs with level and font size), which is then rendered
+against every selected template of the registry, one worker process per
+template.
 """
 
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import os
 
+# Placeholder types (PP_PLACEHOLDER): TITLE, BODY, CENTER_TITLE
+TITLE, BODY, CENTER_TITLE = 1, 2, 3
+
 def remove_template_slides(presentation):
     """Remove all slides from a presentation"""
     while len(presentation.slides) > 0:
@@ -21,7 +29,7 @@ def extract_slide_content(source_slide, slide_idx):
     """Extract title and content shapes from a source slide"""
     title_text = ""
     content_shapes = []
-    
+
     for shape in source_slide.shapes:
         if shape.has_text_frame and shape.text.strip():
             # For title slide (slide 0), treat the main text box as title
@@ -32,207 +40,162 @@ def extract_slide_content(source_slide, slide_idx):
                 title_text = shape.text
             else:
                 content_shapes.append(shape)
-    
+
     return title_text, content_shapes
 
-def apply_template1(source_pptx, template_pptx, output_pptx):
-    """Apply template.pptx design to the source presentation"""
-    print(f"Applying template.pptx to {source_pptx}...")
-    
-    # Load source and template
-    source_prs = Presentation(source_pptx)
-    
-    # Create new presentation using the template
-    new_prs = Presentation(template_pptx)
-    
-    # Remove all slides from template
-    remove_template_slides(new_prs)
-    
-    # Process each slide from source
-    for slide_idx, source_slide in enumerate(source_prs.slides):
-        print(f"Processing slide {slide_idx + 1}/{len(source_prs.slides)}...")
-        
-        # Choose appropriate layout based on slide content
-        if slide_idx == 0:
-            # Title slide - use 封面-01
-            layout = new_prs.slide_layouts[0]
-        else:
-            # Content slide - use 标题和内容（一般样式）
-            layout = new_prs.slide_layouts[9]
-        
-        # Add new slide with chosen layout
-        new_slide = new_prs.slides.add_slide(layout)
-        
-        # Extract title and content
+def extract_deck(source_pptx):
+    """
+    Read the source deck once: one {'title', 'paragraphs'} dict per slide,
+    each paragraph [text, level, size] with the size of its first run in EMU
+    (None when unset). Plain data, so it can be sent to worker processes.
+    """
+    slides = []
+    for slide_idx, source_slide in enumerate(Presentation(source_pptx).slides):
         title_text, content_shapes = extract_slide_content(source_slide, slide_idx)
-        
-        # Apply title and content
-        if slide_idx == 0:
-            # Title slide - use TITLE placeholder
-            if title_text:
-                for new_shape in new_slide.shapes:
-                    if new_shape.is_placeholder and new_shape.placeholder_format.type == 1:
-                        new_shape.text = title_text
-                        for para in new_shape.text_frame.paragraphs:
-                            para.alignment = PP_ALIGN.CENTER
-                            if para.runs:
-                                para.runs[0].font.bold = True
-                        break
-        else:
-            # Content slides - Layout 9 has two BODY placeholders
-            # First BODY is for title, second BODY is for content
-            body_placeholders = [s for s in new_slide.shapes 
-                               if s.is_placeholder and s.placeholder_format.type == 2]
-            body_placeholders.sort(key=lambda s: s.top)  # Sort by vertical position
-            
-            # Apply title to first (top) BODY placeholder
-            if title_text and len(body_placeholders) > 0:
-                title_placeholder = body_placeholders[0]
-                title_placeholder.text = title_text
-                for para in title_placeholder.text_frame.paragraphs:
-                    para.alignment = PP_ALIGN.LEFT
-                    if para.runs:
-                        para.runs[0].font.bold = True
-                        para.runs[0].font.size = Pt(24)
-            
-            # Apply content to second (bottom) BODY placeholder
-            if content_shapes and len(body_placeholders) > 1:
-                content_placeholder = body_placeholders[1]
-                content_placeholder.text_frame.clear()
-                # Copy all paragraphs from all content shapes
-                for content_shape in content_shapes:
-                    for src_para in content_shape.text_frame.paragraphs:
-                        para = content_placeholder.text_frame.add_paragraph()
-                        para.text = src_para.text
-                        para.level = src_para.level
-                        # Preserve font size if available
-                        if src_para.runs and src_para.runs[0].font.size:
-                            for run in para.runs:
-                                run.font.size = src_para.runs[0].font.size
-                # Remove the first empty paragraph if it exists
-                if len(content_placeholder.text_frame.paragraphs) > 0 and content_placeholder.text_frame.paragraphs[0].text == "":
-                    p = content_placeholder.text_frame.paragraphs[0]._element
-                    p.getparent().remove(p)
-    
-    # Save the new presentation
-    new_prs.save(output_pptx)
-    print(f"Saved beautified presentation to: {output_pptx}")
-    print(f"Total slides: {len(new_prs.slides)}")
-
-def apply_template2(source_pptx, template_pptx, output_pptx):
-    """Apply Template2.pptx design to the source presentation"""
-    print(f"Applying Template2.pptx to {source_pptx}...")
-    
-    # Load source and template
-    source_prs = Presentation(source_pptx)
-    
-    # Create new presentation using the template
+        paragraphs = []
+        for content_shape in content_shapes:
+            for src_para in content_shape.text_frame.paragraphs:
+                size = src_para.runs[0].font.size if src_para.runs else None
+                paragraphs.append([src_para.text, src_para.level, int(size) if size else None])
+        slides.append({'title': title_text, 'paragraphs': paragraphs})
+    return slides
+
+def fill_text(shape, text, alignment, size=None):
+    """Set a placeholder's text, aligned and bold (optionally resized)"""
+    shape.text = text
+    for para in shape.text_frame.paragraphs:
+        para.alignment = alignment
+        if para.runs:
+            para.runs[0].font.bold = True
+            if size:
+                para.runs[0].font.size = size
+
+def fill_paragraphs(shape, paragraphs):
+    """Replace a placeholder's paragraphs with extracted ones"""
+    text_frame = shape.text_frame
+    text_frame.clear()
+    for text, level, size in paragraphs:
+        para = text_frame.add_paragraph()
+        para.text = text
+        para.level = level
+        # Preserve font size if available
+        if size:
+            for run in para.runs:
+                run.font.size = size
+    # Remove the first empty paragraph if it exists
+    if len(text_frame.paragraphs) > 0 and text_frame.paragraphs[0].text == "":
+        p = text_frame.paragraphs[0]._element
+        p.getparent().remove(p)
+
+def place_body_pair(slide, slide_idx, title_text, paragraphs):
+    """Title slide: TITLE placeholder. Content slides: title and content in two BODY placeholders"""
+    if slide_idx == 0:
+        if title_text:
+            for shape in slide.shapes:
+                if shape.is_placeholder and shape.placeholder_format.type == TITLE:
+                    fill_text(shape, title_text, PP_ALIGN.CENTER)
+                    break
+        return
+    # First (top) BODY is for the title, second BODY is for the content
+    bodies = [s for s in slide.shapes if s.is_placeholder and s.placeholder_format.type == BODY]
+    bodies.sort(key=lambda s: s.top)
+    if title_text and len(bodies) > 0:
+        fill_text(bodies[0], title_text, PP_ALIGN.LEFT, Pt(24))
+    if paragraphs and len(bodies) > 1:
+        fill_paragraphs(bodies[1], paragraphs)
+
+def place_title_body(slide, slide_idx, title_text, paragraphs):
+    """Title in the TITLE / CENTER_TITLE placeholder, content in the first BODY placeholder"""
+    if title_text:
+        for shape in slide.shapes:
+            if shape.is_placeholder and shape.placeholder_format.type in (TITLE, CENTER_TITLE):
+                fill_text(shape, title_text, PP_ALIGN.CENTER if slide_idx == 0 else PP_ALIGN.LEFT)
+                break
+    if paragraphs:
+        for shape in slide.shapes:
+            if shape.is_placeholder and shape.placeholder_format.type == BODY:
+                fill_paragraphs(shape, paragraphs)
+                break
+
+# House styles: template file, output deck, (title slide, content slide)
+# layout indices in the template, and how a slide's placeholders are filled
+TEMPLATES = {
+    'v1': {'template': 'template.pptx', 'output': 'block_lecture_beautified_v1.pptx',
+           'layouts': (0, 9),  # 封面-01, 标题和内容（一般样式）
+           'place': place_body_pair},
+    'v2': {'template': 'Template2.pptx', 'output': 'block_lecture_beautified_v2.pptx',
+           'layouts': (0, 2),  # TITLE, TITLE_AND_BODY
+           'place': place_title_body},
+}
+
+def render(slides, name, template_pptx, output_pptx):
+    """Render an extracted deck with one registered template; returns the slide count"""
+    style = TEMPLATES[name]
     new_prs = Presentation(template_pptx)
-    
-    # Remove all slides from template
     remove_template_slides(new_prs)
-    
-    # Process each slide from source
-    for slide_idx, source_slide in enumerate(source_prs.slides):
-        print(f"Processing slide {slide_idx + 1}/{len(source_prs.slides)}...")
-        
-        # Choose appropriate layout based on slide content
-        if slide_idx == 0:
-            # Title slide - use TITLE layout
-            layout = new_prs.slide_layouts[0]
-        else:
-            # Content slide - use TITLE_AND_BODY layout
-            layout = new_prs.slide_layouts[2]
-        
-        # Add new slide with chosen layout
+    title_layout, content_layout = style['layouts']
+    for slide_idx, slide in enumerate(slides):
+        layout = new_prs.slide_layouts[title_layout if slide_idx == 0 else content_layout]
         new_slide = new_prs.slides.add_slide(layout)
-        
-        # Extract title and content
-        title_text, content_shapes = extract_slide_content(source_slide, slide_idx)
-        
-        # Apply title
-        if title_text:
-            for new_shape in new_slide.shapes:
-                # Handle both CENTER_TITLE (3) and TITLE (1) placeholder types
-                if new_shape.is_placeholder and new_shape.placeholder_format.type in [1, 3]:
-                    new_shape.text = title_text
-                    for para in new_shape.text_frame.paragraphs:
-                        para.alignment = PP_ALIGN.CENTER if slide_idx == 0 else PP_ALIGN.LEFT
-                        if para.runs:
-                            para.runs[0].font.bold = True
-                    break
-        
-        # Apply content
-        if content_shapes:
-            for new_shape in new_slide.shapes:
-                if new_shape.is_placeholder and new_shape.placeholder_format.type == 2:  # Content placeholder
-                    new_shape.text_frame.clear()
-                    # Copy all paragraphs from all content shapes
-                    for content_shape in content_shapes:
-                        for src_para in content_shape.text_frame.paragraphs:
-                            para = new_shape.text_frame.add_paragraph()
-                            para.text = src_para.text
-                            para.level = src_para.level
-                            # Preserve font size if available
-                            if src_para.runs and src_para.runs[0].font.size:
-                                for run in para.runs:
-                                    run.font.size = src_para.runs[0].font.size
-                    # Remove the first empty paragraph if it exists
-                    if len(new_shape.text_frame.paragraphs) > 0 and new_shape.text_frame.paragraphs[0].text == "":
-                        p = new_shape.text_frame.paragraphs[0]._element
-                        p.getparent().remove(p)
-                    break
-    
-    # Save the new presentation
+        style['place'](new_slide, slide_idx, slide['title'], slide['paragraphs'])
     new_prs.save(output_pptx)
-    print(f"Saved beautified presentation to: {output_pptx}")
-    print(f"Total slides: {len(new_prs.slides)}")
+    return len(new_prs.slides)
+
+def render_all(slides, jobs):
+    """
+    Render one extracted deck with several templates: jobs maps a registry
+    name to its (template, output) paths. Runs in worker processes when
+    there is more than one job; returns {name: slide count}.
+    """
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        return {name: render(slides, name, *paths) for name, paths in jobs.items()}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(render, slides, name, *paths) for name, paths in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
 
 def main():
     """Main function to generate beautified presentations"""
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    source_pptx = os.path.join(script_dir, 'block_lecture.pptx')
-    template1_pptx = os.path.join(script_dir, 'template.pptx')
-    template2_pptx = os.path.join(script_dir, 'Template2.pptx')
-    
-    output1_pptx = os.path.join(script_dir, 'block_lecture_beautified_v1.pptx')
-    output2_pptx = os.path.join(script_dir, 'block_lecture_beautified_v2.pptx')
-    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-t', '--template', action='append', choices=sorted(TEMPLATES),
+                        help='registered template to render (repeatable; default: all)')
+    parser.add_argument('--source', default=os.path.join(script_dir, 'block_lecture.pptx'),
+                        help='deck to beautify (default: block_lecture.pptx next to this script)')
+    parser.add_argument('-d', '--directory', default=script_dir,
+                        help='where the templates are read and the decks written')
+    args = parser.parse_args()
+
+    names = args.template or list(TEMPLATES)
+    jobs = {name: (os.path.join(args.directory, TEMPLATES[name]['template']),
+                   os.path.join(args.directory, TEMPLATES[name]['output']))
+            for name in names}
+
     # Validate required files exist
-    required_files = [
-        (source_pptx, 'Source presentation'),
-        (template1_pptx, 'Template 1'),
-        (template2_pptx, 'Template 2')
-    ]
-    
+    required_files = [(args.source, 'Source presentation')]
+    required_files += [(template, f"Template {name}") for name, (template, _) in jobs.items()]
+
     missing_files = []
     for filepath, description in required_files:
         if not os.path.exists(filepath):
             missing_files.append(f"{description}: {filepath}")
-    
+
     if missing_files:
         print("❌ Error: Required files are missing:")
         for missing in missing_files:
             print(f"  - {missing}")
         print("\nPlease ensure all required files are present before running this script.")
         return 1
-    
-    # Apply both templates
-    print("=" * 60)
-    print("Creating beautified version 1 using template.pptx...")
-    print("=" * 60)
-    apply_template1(source_pptx, template1_pptx, output1_pptx)
-    
-    print("\n" + "=" * 60)
-    print("Creating beautified version 2 using Template2.pptx...")
+
+    slides = extract_deck(args.source)
+    print(f"Extracted {len(slides)} slides from {args.source}")
+    print(f"Rendering {len(jobs)} template(s): {', '.join(names)}")
+    counts = render_all(slides, jobs)
+
     print("=" * 60)
-    apply_template2(source_pptx, template2_pptx, output2_pptx)
-    
-    print("\n" + "=" * 60)
     print("✅ Beautification complete!")
-    print(f"✅ Created: {output1_pptx}")
-    print(f"✅ Created: {output2_pptx}")
+    for name, (template, output) in jobs.items():
+        print(f"✅ Created: {output} ({os.path.basename(template)}, {counts[name]} slides)")
     print("=" * 60)
     return 0
 
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the block-decomposition engines (Q1-Q4).
+Runs every engine over a grid of n, operation mixes and block sizes, records
+wall time (best of several repeats), peak RSS and operations per second to
+a JSON-lines results file, and flags regressions against the stored history
+of the same machine and Python / NumPy versions. Apparent regressions are
+measured again after the grid next to control cases (the machine's speed
+drifts for seconds at a time) and only reported if their best time, with
+the controls' slowdown taken out, stays slow.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+
+import numpy as np
+
+from block_common import default_block_size
+from block_framework import (FrameworkQ1Engine, FrameworkQ2Engine, FrameworkQ3Engine,
+                             FrameworkQ4Engine)
+from gen_workload import make_workload
+from q1_engine import Q1BlockEngine
+from q2_engine import Q2AdaptiveEngine, Q2BlockEngine, Q2IntervalEngine
+from q3_engine import Q3BlockEngine, Q3FenwickEngine
+from q4_engine import Q4BlockEngine, Q4ValueEngine
+
+# Every engine per problem, by name
+BACKENDS = {
+    1: {'block': Q1BlockEngine, 'framework': FrameworkQ1Engine},
+    2: {'block': Q2BlockEngine, 'interval': Q2IntervalEngine, 'adaptive': Q2AdaptiveEngine,
+        'framework': FrameworkQ2Engine},
+    3: {'block': Q3BlockEngine, 'fenwick': Q3FenwickEngine, 'framework': FrameworkQ3Engine},
+    4: {'block': Q4BlockEngine, 'value': Q4ValueEngine, 'framework': FrameworkQ4Engine},
+}
+
+# Operation mixes: share of queries and maximum range length as a share of n
+MIXES = {
+    'balanced': {'query': 0.5, 'span': 1.0},
+    'update-heavy': {'query': 0.1, 'span': 1.0},
+    'query-heavy': {'query': 0.9, 'span': 1.0},
+    'short-ranges': {'query': 0.5, 'span': 0.01},
+}
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+DEFAULT_SCALES = [0.5, 1.0, 2.0]
+# Fields of run_metadata() that must match for timings to be comparable
+ENV_FIELDS = ('host', 'machine', 'python', 'numpy')
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_results.jsonl')
+
+def _run_case(case):
+    """Run one benchmark case in a fresh worker process and return its metrics"""
+    engine_cls = BACKENDS[case['problem']][case['engine']]
+    values, ops = make_workload(case['problem'], case['n'], case['ops'], seed=case['seed'],
+                                **MIXES[case['mix']])
+    # At least `repeat` runs and min_time seconds in total; the best run is
+    # the one least disturbed by the rest of the machine
+    best = None
+    runs = 0
+    spent = 0.0
+    while runs < case['repeat'] or spent < case['min_time']:
+        start = time.perf_counter()
+        engine = engine_cls(values, block_size=case['block_size'])
+        built = time.perf_counter()
+        engine.run(*ops)
+        done = time.perf_counter()
+        if best is None or done - start < best[0]:
+            best = (done - start, built - start)
+        del engine
+        runs += 1
+        spent += done - start
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = dict(case)
+    result.update({
+        'seconds': best[0],
+        'build_seconds': best[1],
+        'runs': runs,
+        'ops_per_sec': case['ops'] / best[0] if best[0] > 0 else float('inf'),
+        'peak_rss_kb': peak,
+    })
+    return result
+
+def case_key(record):
+    """Identity of a case across runs, including the environment it ran in"""
+    return (record['problem'], record['engine'], record['n'], record['ops'],
+            record['mix'], record['block_scale']) + tuple(record.get(f) for f in ENV_FIELDS)
+
+def build_cases(args):
+    """Expand the command-line grid into case dictionaries"""
+    cases = []
+    for problem in args.problems:
+        engines = args.engines or sorted(BACKENDS[problem])
+        for name in engines:
+            if name not in BACKENDS[problem]:
+                continue
+            for n in args.sizes:
+                q = min(n, args.max_ops) if args.max_ops else n
+                for mix in args.mixes:
+                    for scale in args.block_scales:
+                        cases.append({
+                            'problem': problem,
+                            'engine': name,
+                            'n': n,
+                            'ops': q,
+                            'mix': mix,
+                            'block_scale': scale,
+                            'block_size': max(1, int(default_block_size(n) * scale)),
+                            'seed': args.seed,
+                            'repeat': args.repeat,
+                            'min_time': args.min_time,
+                        })
+    return cases
+
+def load_history(path):
+    """Read previous results, grouped by case key"""
+    history = {}
+    if not os.path.exists(path):
+        return history
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                history.setdefault(case_key(record), []).append(record)
+    return history
+
+def history_seconds(record, history):
+    """Median time of the earlier runs of a case"""
+    return statistics.median(p['seconds'] for p in history[case_key(record)])
+
+def find_regressions(results, history, tolerance, noise_floor, min_history):
+    """
+    Cases whose ops/sec fell more than tolerance below the median of at least
+    min_history earlier runs in the same environment, and whose time grew by
+    more than noise_floor seconds (shorter differences are timer and
+    scheduler noise). A record's 'slowdown', the factor the whole machine was
+    running behind its history when it was measured, scales the history first
+    """
+    regressions = []
+    for record in results:
+        past = history.get(case_key(record), [])
+        if len(past) < min_history:
+            continue
+        slowdown = record.get('slowdown', 1.0)
+        baseline = statistics.median(p['ops_per_sec'] for p in past) / slowdown
+        slower = record['seconds'] - history_seconds(record, history) * slowdown
+        if record['ops_per_sec'] < baseline * (1 - tolerance) and slower > noise_floor:
+            regressions.append((record, baseline))
+    return regressions
+
+def pick_controls(suspects, results, history):
+    """For each suspect, the unsuspected case with the closest history time"""
+    candidates = [r for r in results if r not in suspects and case_key(r) in history]
+    if not candidates:
+        return []
+    picks = []
+    for suspect in suspects:
+        target = history_seconds(suspect, history)
+        picks.append(min(candidates, key=lambda r: abs(history_seconds(r, history) - target)))
+    return list({case_key(r): r for r in picks}.values())
+
+def machine_slowdown(results, history):
+    """Median ratio of the results' times to their history medians, at least 1"""
+    ratios = [r['seconds'] / history_seconds(r, history) for r in results]
+    return max(1.0, statistics.median(ratios)) if ratios else 1.0
+
+def run_metadata():
+    """Fields identifying the code and machine a run was made on"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=script_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'host': platform.node(),
+        'machine': platform.machine(),
+    }
+
+def main():
+    """Run the benchmark grid, store the results and report regressions"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--problems', type=int, nargs='+', default=[1, 2, 3, 4], choices=[1, 2, 3, 4])
+    parser.add_argument('--engines', nargs='+', default=None,
+                        help='engine names to run (default: all for each problem)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--max-ops', type=int, default=None,
+                        help='cap the number of operations per case (default: n)')
+    parser.add_argument('--mixes', nargs='+', default=sorted(MIXES), choices=sorted(MIXES))
+    parser.add_argument('--block-scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help='block sizes as multiples of √n')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='minimum runs per case; the best one is recorded')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='keep repeating a case until its runs took this many seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--results', default=DEFAULT_RESULTS)
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed ops/sec drop against the history median')
+    parser.add_argument('--min-history', type=int, default=3,
+                        help='earlier runs a case needs before it is checked for regressions')
+    parser.add_argument('--confirm', type=int, default=2,
+                        help='rounds of re-measuring apparent regressions after the grid')
+    parser.add_argument('--noise-floor', type=float, default=0.01,
+                        help='seconds a case must slow down by before it counts as a regression')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    cases = build_cases(args)
+    history = load_history(args.results)
+    meta = run_metadata()
+    # A fresh spawned process per case keeps peak RSS measurements separate
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+        def measure(batch, save=True):
+            for result in pool.map(_run_case, batch):
+                result.update(meta)
+                print(f"Q{result['problem']} {result['engine']:<9} n={result['n']:<9} "
+                      f"{result['mix']:<13} B={result['block_size']:<6} "
+                      f"{result['seconds']:9.3f}s {result['ops_per_sec']:12.0f} ops/s "
+                      f"{result['peak_rss_kb'] / 1024:8.1f} MiB")
+                if save and not args.no_save:
+                    with open(args.results, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(result) + '\n')
+                yield result
+
+        results = list(measure(cases))
+        regressions = find_regressions(results, history, args.tolerance, args.noise_floor,
+                                       args.min_history)
+        for _ in range(args.confirm):
+            if not regressions:
+                break
+            # Unsuspected cases measured alongside tell a slow machine from a slow
+            # engine. These runs are picked for being slow, so they stay out of the history
+            suspects = [record for record, _ in regressions]
+            controls = pick_controls(suspects, results, history)
+            print(f"\nMeasuring {len(suspects)} apparent regression(s) again "
+                  f"alongside {len(controls)} control case(s):")
+            batch = [r for pair in zip_longest(suspects, controls) for r in pair if r is not None]
+            again = measure([{k: r[k] for k in cases[0]} for r in batch], save=False)
+            again = {case_key(r): r for r in again}
+            slowdown = machine_slowdown([again[case_key(r)] for r in controls], history)
+            print(f"  control cases ran at {slowdown:.2f}x their history time")
+            # Keep each suspect's best time once the machine's slowdown is taken out
+            for record in suspects:
+                retry = again[case_key(record)]
+                retry['slowdown'] = slowdown
+                if retry['seconds'] / slowdown < record['seconds'] / record.get('slowdown', 1.0):
+                    results[results.index(record)] = retry
+            regressions = find_regressions(results, history, args.tolerance,
+                                           args.noise_floor, args.min_history)
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against stored history of this machine:")
+        for record, baseline in regressions:
+            print(f"  - Q{record['problem']} {record['engine']} n={record['n']} {record['mix']} "
+                  f"B={record['block_size']}: {record['ops_per_sec']:.0f} ops/s "
+                  f"(expected {baseline:.0f})")
+        return 1
+    print(f"\n✅ {len(results)} case(s), no regressions")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operation-mix-aware block-size autotuner for the Q1-Q4 engines.
+Times candidate block sizes on a shadow copy over the first k operations of a
+stream, picks the fastest, and can re-tune (and re-block) mid-stream.
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from block_common import default_block_size, load_input
+from q1_engine import Q1BlockEngine
+from q2_engine import Q2AdaptiveEngine
+from q3_engine import Q3BlockEngine
+from q4_engine import Q4BlockEngine
+
+# Default engine for each problem
+ENGINES = {
+    1: Q1BlockEngine,
+    2: Q2AdaptiveEngine,
+    3: Q3BlockEngine,
+    4: Q4BlockEngine,
+}
+
+# Multiples of √n tried by default
+SCALES = (0.25, 0.5, 1, 2, 4)
+
+def candidate_block_sizes(n):
+    """Block sizes around √n, plus √(n log n) as suggested for Example 4"""
+    root = default_block_size(n)
+    sizes = {max(1, int(root * s)) for s in SCALES}
+    sizes.add(max(1, math.isqrt(int(n * math.log2(max(n, 2))))))
+    return sorted(b for b in sizes if b <= max(n, 1))
+
+def time_block_size(engine_cls, values, ops, block_size):
+    """Seconds taken by a fresh engine with this block size to run ops"""
+    shadow = engine_cls(values, block_size=block_size)
+    start = time.perf_counter()
+    shadow.run(*ops)
+    return time.perf_counter() - start
+
+def autotune(engine_cls, values, ops, sample=2000, candidates=None):
+    """
+    Pick the fastest block size for the first `sample` operations of ops
+    (a tuple of opt, l, r, c arrays). Engines copy their input, so values is
+    left untouched. Returns (best block size, {block size: seconds}).
+    """
+    head = tuple(np.asarray(col)[:sample] for col in ops)
+    if candidates is None:
+        candidates = candidate_block_sizes(len(values))
+    timings = {b: time_block_size(engine_cls, values, head, b) for b in candidates}
+    best = min(timings, key=timings.get)
+    return best, timings
+
+def run_tuned(engine_cls, values, ops, sample=2000, retune_every=None, log=None):
+    """
+    Run a whole operation stream with an autotuned block size and return the
+    answers. With retune_every set, the next `sample` operations are re-timed
+    on a shadow of the current state every retune_every operations and the
+    live engine is re-blocked when a different size wins.
+    """
+    opt, l, r, c = (np.asarray(col) for col in ops)
+    total = len(opt)
+    step = retune_every or total
+    engine = None
+    answers = []
+    for pos in range(0, total, step):
+        window = (opt[pos:], l[pos:], r[pos:], c[pos:])
+        current = values if engine is None else engine.to_array()
+        best, timings = autotune(engine_cls, current, window, sample)
+        if engine is None or best != engine.block_size:
+            if log is not None:
+                log(f"op {pos}: block size {best} "
+                    f"({', '.join(f'{b}: {t:.4f}s' for b, t in sorted(timings.items()))})")
+            engine = engine_cls(current, block_size=best)
+        end = pos + step
+        answers.extend(engine.run(opt[pos:end], l[pos:end], r[pos:end], c[pos:end]))
+    return answers
+
+def main():
+    """Solve a Q1-Q4 input with an autotuned block size and print the answers"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('problem', type=int, choices=sorted(ENGINES))
+    parser.add_argument('input', nargs='?', default=None)
+    parser.add_argument('--sample', type=int, default=2000,
+                        help='operations timed per candidate block size')
+    parser.add_argument('--retune-every', type=int, default=None,
+                        help='re-tune and re-block every N operations')
+    args = parser.parse_args()
+
+    values, opt, l, r, c = load_input(args.input, args.problem)
+    answers = run_tuned(ENGINES[args.problem], values, (opt, l, r, c), args.sample,
+                        args.retune_every, log=lambda msg: print(msg, file=sys.stderr))
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the block-decomposition engines (q1_engine.py - q4_engine.py).
+Block size selection, range splitting and loading of the Q1-Q4 input formats.
+"""
+
+import math
+import sys
+
+from block_input import parse_input
+
+def default_block_size(n):
+    """Return the textbook block size B = √n (at least 1)"""
+    return max(1, math.isqrt(n))
+
+def whole_range(l, r, block_size, n):
+    """
+    Split 0-based [l, r] of an n-element array into (bl, br, wl, wr): the end
+    blocks bl, br and the whole blocks wl..wr (empty when wl > wr). A fully
+    covered end block counts as whole.
+    """
+    bl = l // block_size
+    br = r // block_size
+    wl = bl if l == bl * block_size else bl + 1
+    wr = br if r == min((br + 1) * block_size, n) - 1 else br - 1
+    return bl, br, wl, wr
+
+def load_input(path, problem):
+    """
+    Load a Q1-Q4 input file into (values, opt, l, r, c) NumPy arrays.
+    Missing columns (opt for Q2, c for Q3) are filled with zeros; Q4 'M'/'A'
+    are mapped to opt 0/1. Reads stdin when path is None or '-'.
+    """
+    if path is None or path == '-':
+        return parse_input(sys.stdin.buffer.read(), problem)
+    return parse_input(path, problem)
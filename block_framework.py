@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reusable lazy-tag block-decomposition core. A problem plugs in a tag monoid
+(compose onto whole blocks, apply to a block, apply to elements) and a block
+aggregate (per-block summary plus whole-block queries); LazyBlockArray owns
+the shared skeleton and its fast paths: partial-block brute force, batched
+tag composition over whole-block slices, vectorized pushdown and skip
+pointers past blocks that updates no longer change.
+
+Q1-Q4 are expressed as plug-ins at the bottom (FRAMEWORK_ENGINES).
+"""
+
+import sys
+from abc import ABC, abstractmethod
+from array import array
+
+import numpy as np
+
+from block_common import default_block_size, load_input, whole_range
+from block_storage import BlockStorage
+from q1_engine import MOD
+from q3_engine import exact_sum, isqrt_u64
+
+class TagMonoid(ABC):
+    """
+    How updates act on blocks. Tags are per-block metadata fields; tags passed
+    to apply() are scalars for one block or arrays aligned with the elements.
+    """
+
+    # Tag field name -> (dtype, identity)
+    fields = {}
+    # False: whole-block updates cannot be tagged and go to the elements
+    taggable = True
+    # Keep next-live-block pointers past blocks where inert() holds
+    skips = False
+
+    @abstractmethod
+    def compose(self, tags, update):
+        """Fold update into the tag slices of a run of whole blocks, in place"""
+
+    def apply(self, seg, tags):
+        """Write tags into the elements seg"""
+
+    def is_identity(self, tags):
+        """Whether a block's tags leave its elements unchanged"""
+        return True
+
+    @abstractmethod
+    def apply_elements(self, seg, update):
+        """Apply update to the elements seg directly"""
+
+    def inert(self, meta, b):
+        """Whether updates can no longer change block b"""
+        return False
+
+class BlockAggregate(ABC):
+    """Per-block summary kept in sync with the elements, and the queries on it"""
+
+    # Aggregate field name -> dtype
+    fields = {}
+    # Extra element planes with the values dtype (e.g. sorted copies)
+    planes = ()
+
+    def build(self, store, b):
+        """Recompute block b's summary from its elements (tags are identity)"""
+
+    def update_whole(self, meta, wl, wr, update):
+        """Adjust the summaries of whole blocks wl..wr after a tagged update"""
+
+    @abstractmethod
+    def query_elements(self, seg, tags, query):
+        """Answer query on elements seg of a block with the given tags"""
+
+    @abstractmethod
+    def query_blocks(self, store, wl, wr, query):
+        """Answer query on whole blocks wl..wr"""
+
+class LazyBlockArray:
+    """√n block decomposition driven by a TagMonoid and a BlockAggregate"""
+
+    def __init__(self, values, tags, aggregate, block_size=None, dtype=None, stats=None,
+                 storage=None):
+        values = np.asarray(values)
+        self.n = len(values)
+        self.block_size = block_size or default_block_size(self.n)
+        self.tags = tags
+        self.aggregate = aggregate
+        self.store = store = (storage or BlockStorage)(self.n, self.block_size)
+        self.sizes = store.sizes()
+        dtype = dtype or values.dtype
+        self.a = store.add_plane('values', dtype)
+        self.a[:] = values
+        for name in aggregate.planes:
+            store.add_plane(name, dtype)
+        for name, (field_dtype, identity) in tags.fields.items():
+            store.add_meta(name, field_dtype, identity)
+        for name, field_dtype in aggregate.fields.items():
+            store.add_meta(name, field_dtype)
+        self.meta = store.meta
+        # Optional block_stats.BlockStats instrumentation
+        self.stats = stats
+        for b in range(store.nblocks):
+            aggregate.build(store, b)
+        # nxt[b] leads (with path compression) to the first block >= b that is
+        # not inert; nblocks is the sentinel
+        self.nxt = None
+        if tags.skips:
+            self.nxt = array('q', range(store.nblocks + 1))
+            for b in range(store.nblocks):
+                if tags.inert(self.meta, b):
+                    self.nxt[b] = b + 1
+
+    def _block_tags(self, b):
+        """Tag values of block b"""
+        meta = self.meta
+        return {name: meta[name][b] for name in self.tags.fields}
+
+    def _pushdown(self, b):
+        """Write block b's tags into its elements and reset them to identity"""
+        tags = self._block_tags(b)
+        if self.tags.is_identity(tags):
+            return
+        self.tags.apply(self.store.writable(b), tags)
+        self.store.mark_dirty(b)
+        for name, (_, identity) in self.tags.fields.items():
+            self.meta[name][b] = identity
+        if self.stats is not None:
+            self.stats.pushdowns += 1
+
+    def pushdown_all(self):
+        """Push every block's tags down (e.g. before handing the elements out)"""
+        meta = self.meta
+        fields = self.tags.fields
+        # Only blocks with a non-identity tag are written
+        pending = np.zeros(self.store.nblocks, dtype=bool)
+        for name, (_, identity) in fields.items():
+            pending |= meta[name] != identity
+        for b in np.flatnonzero(pending).tolist():
+            self._pushdown(b)
+            self._rebuild(b)
+
+    def _rebuild(self, b):
+        """Recompute block b's aggregate and unlink it once it is inert"""
+        self.aggregate.build(self.store, b)
+        if self.stats is not None:
+            self.stats.rebuilds += 1
+        if self.nxt is not None and self.tags.inert(self.meta, b):
+            self.nxt[b] = b + 1
+
+    def _find(self, b):
+        """Return the first block with index >= b that is not inert"""
+        nxt = self.nxt
+        root = b
+        while nxt[root] != root:
+            root = nxt[root]
+        while nxt[b] != root:
+            nxt[b], b = root, nxt[b]
+        return root
+
+    def _update_partial(self, b, start, stop, update):
+        """Brute-force update of elements [start, stop) of block b"""
+        if self.nxt is not None and self.tags.inert(self.meta, b):
+            return
+        if self.stats is not None:
+            self.stats.touched += stop - start
+        self._pushdown(b)
+        base = b * self.block_size
+        self.tags.apply_elements(self.store.writable(b)[start - base:stop - base], update)
+        self.store.mark_dirty(b)
+        self._rebuild(b)
+
+    def _update_whole(self, wl, wr, update):
+        """Update whole blocks wl..wr: compose tags, or sweep the live blocks"""
+        tags = self.tags
+        stats = self.stats
+        if tags.taggable:
+            meta = self.meta
+            tags.compose({name: meta[name][wl:wr + 1] for name in tags.fields}, update)
+            self.aggregate.update_whole(meta, wl, wr, update)
+            if stats is not None:
+                stats.whole += wr + 1 - wl
+            return
+        store = self.store
+        b = self._find(wl) if self.nxt is not None else wl
+        while b <= wr:
+            if stats is not None:
+                stats.whole += 1
+            self._pushdown(b)
+            tags.apply_elements(store.writable(b), update)
+            store.mark_dirty(b)
+            self._rebuild(b)
+            b = self._find(b + 1) if self.nxt is not None else b + 1
+
+    def _update(self, l, r, update):
+        """Apply update on 0-based [l, r]"""
+        B = self.block_size
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        if bl == br and wl > wr:
+            self._update_partial(bl, l, r + 1, update)
+            return
+        if wl != bl:
+            self._update_partial(bl, l, (bl + 1) * B, update)
+        if wr != br:
+            self._update_partial(br, br * B, r + 1, update)
+        if wl <= wr:
+            self._update_whole(wl, wr, update)
+
+    def _query_partial(self, b, start, stop, query):
+        """Answer query on elements [start, stop) of block b without a pushdown"""
+        if self.stats is not None:
+            self.stats.touched += stop - start
+        base = b * self.block_size
+        seg = self.store.data(b)[start - base:stop - base]
+        return self.aggregate.query_elements(seg, self._block_tags(b), query)
+
+    def _query(self, l, r, query):
+        """Answer query on 0-based [l, r]; partial results are added up"""
+        B = self.block_size
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        if bl == br and wl > wr:
+            return self._query_partial(bl, l, r + 1, query)
+        total = 0
+        if wl != bl:
+            total += self._query_partial(bl, l, (bl + 1) * B, query)
+        if wr != br:
+            total += self._query_partial(br, br * B, r + 1, query)
+        if wl <= wr:
+            if self.stats is not None:
+                self.stats.whole += wr + 1 - wl
+            total += self.aggregate.query_blocks(self.store, wl, wr, query)
+        return total
+
+    def update(self, l, r, update):
+        """Apply update to every a_i with l <= i <= r (1-based)"""
+        self._update(l - 1, r - 1, update)
+
+    def query(self, l, r, query):
+        """Answer query over l <= i <= r (1-based)"""
+        return self._query(l - 1, r - 1, query)
+
+    def to_array(self):
+        """Return the current values as a new array"""
+        self.store.flush()
+        out = self.store.plane().copy()
+        meta = self.meta
+        self.tags.apply(out, {name: np.repeat(meta[name], self.sizes) for name in self.tags.fields})
+        return out
+
+# Example 1: affine maps x -> x * mul + add (mod MOD), point queries
+
+class AffineTag(TagMonoid):
+    """x -> x * mul + add modulo MOD; updates are (opt, c) with opt 0 = add, 1 = multiply"""
+
+    fields = {'mul': (np.int64, 1), 'add': (np.int64, 0)}
+
+    def compose(self, tags, update):
+        opt, c = update
+        if opt == 0:
+            tags['add'] += c
+            tags['add'] %= MOD
+        else:
+            for name in ('mul', 'add'):
+                tags[name] *= c
+                tags[name] %= MOD
+
+    def apply(self, seg, tags):
+        seg *= tags['mul']
+        seg += tags['add']
+        seg %= MOD
+
+    def is_identity(self, tags):
+        return tags['mul'] == 1 and tags['add'] == 0
+
+    def apply_elements(self, seg, update):
+        opt, c = update
+        if opt == 0:
+            seg += c
+        else:
+            seg *= c
+        seg %= MOD
+
+class PointValue(BlockAggregate):
+    """No summary: point queries read the element through the tag"""
+
+    def query_elements(self, seg, tags, query):
+        return int((seg[0] * tags['mul'] + tags['add']) % MOD)
+
+    def query_blocks(self, store, wl, wr, query):
+        # A point only covers a whole block of one element (e.g. a short last block)
+        meta = store.meta
+        return self.query_elements(store.data(wl), {'mul': meta['mul'][wl], 'add': meta['add'][wl]},
+                                   query)
+
+# Example 2: assignment tags, count of c
+
+class AssignTag(TagMonoid):
+    """Assign c to every element; tag is only meaningful where tagged is set"""
+
+    fields = {'tag': (np.int64, 0), 'tagged': (bool, False)}
+
+    def compose(self, tags, c):
+        tags['tag'][:] = c
+        tags['tagged'][:] = True
+
+    def apply(self, seg, tags):
+        np.copyto(seg, tags['tag'], where=tags['tagged'])
+
+    def is_identity(self, tags):
+        return not tags['tagged']
+
+    def apply_elements(self, seg, c):
+        seg[:] = c
+
+class ValueCount(BlockAggregate):
+    """Sorted copy of each block, so counting c in a whole block is two binary searches"""
+
+    planes = ('sorted',)
+
+    def build(self, store, b):
+        srt = store.writable(b, 'sorted')
+        srt[:] = store.data(b)
+        srt.sort()
+        store.mark_dirty(b, 'sorted')
+
+    def query_elements(self, seg, tags, c):
+        if tags['tagged']:
+            return len(seg) if tags['tag'] == c else 0
+        return int(np.count_nonzero(seg == c))
+
+    def query_blocks(self, store, wl, wr, c):
+        tagged = store.meta['tagged'][wl:wr + 1]
+        hit = tagged & (store.meta['tag'][wl:wr + 1] == c)
+        found = int(store.sizes()[wl:wr + 1][hit].sum())
+        for b in (np.flatnonzero(~tagged) + wl).tolist():
+            srt = store.data(b, 'sorted')
+            found += int(srt.searchsorted(c, 'right') - srt.searchsorted(c, 'left'))
+        return found
+
+# Example 3: range sqrt (untaggable, converged blocks skipped), range sum
+
+class SqrtUpdate(TagMonoid):
+    """a_i <- ⌊√a_i⌋; a block with max <= 1 no longer changes"""
+
+    taggable = False
+    skips = True
+
+    def compose(self, tags, update):
+        # Never called: untaggable updates always go to the elements
+        raise TypeError("⌊√⌋ updates cannot be composed into a block tag")
+
+    def apply_elements(self, seg, update):
+        seg[:] = isqrt_u64(seg)
+
+    def inert(self, meta, b):
+        return meta['max'][b] <= 1
+
+class SumMax(BlockAggregate):
+    """Exact block sums (Python ints, may exceed 64 bits) and maxima"""
+
+    fields = {'sum': object, 'max': np.uint64}
+
+    def build(self, store, b):
+        seg = store.data(b)
+        store.meta['sum'][b] = exact_sum(seg)
+        store.meta['max'][b] = seg.max()
+
+    def query_elements(self, seg, tags, query):
+        return exact_sum(seg)
+
+    def query_blocks(self, store, wl, wr, query):
+        return int(store.meta['sum'][wl:wr + 1].sum())
+
+# Example 4: add tags, count of heights >= k
+
+class AddTag(TagMonoid):
+    """Add h to every element"""
+
+    fields = {'add': (np.int64, 0)}
+
+    def compose(self, tags, h):
+        tags['add'] += h
+
+    def apply(self, seg, tags):
+        seg += tags['add']
+
+    def is_identity(self, tags):
+        return tags['add'] == 0
+
+    def apply_elements(self, seg, h):
+        seg += h
+
+class SortedCount(BlockAggregate):
+    """Sorted copy of each block (without its add tag) for counts of >= k"""
+
+    planes = ('sorted',)
+
+    def build(self, store, b):
+        srt = store.writable(b, 'sorted')
+        srt[:] = store.data(b)
+        srt.sort()
+        store.mark_dirty(b, 'sorted')
+
+    def query_elements(self, seg, tags, k):
+        return int(np.count_nonzero(seg >= k - tags['add']))
+
+    def query_blocks(self, store, wl, wr, k):
+        keys = (k - store.meta['add'][wl:wr + 1]).tolist()
+        found = 0
+        for b, key in zip(range(wl, wr + 1), keys):
+            found += store.data(b, 'sorted').searchsorted(key)
+        return int(store.sizes()[wl:wr + 1].sum()) - int(found)
+
+class FrameworkQ1Engine(LazyBlockArray):
+    """Example 1 on the generic core"""
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        values = np.asarray(values, dtype=np.int64) % MOD
+        super().__init__(values, AffineTag(), PointValue(), block_size, np.int64, stats, storage)
+
+    def run(self, opt, l, r, c):
+        """Replay columnar operations and return the point query answers"""
+        answers = []
+        stats = self.stats
+        for o, lo, hi, x in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                                np.asarray(r).tolist(), np.asarray(c).tolist()):
+            if o == 2:
+                answers.append(self._query(hi - 1, hi - 1, None))
+            else:
+                self._update(lo - 1, hi - 1, (o, x % MOD))
+            if stats is not None:
+                stats.end_op(o)
+        return answers
+
+class FrameworkQ2Engine(LazyBlockArray):
+    """Example 2 on the generic core"""
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        super().__init__(values, AssignTag(), ValueCount(), block_size, np.int64, stats, storage)
+
+    def run(self, opt, l, r, c):
+        """Replay columnar operations and return every count (opt is ignored)"""
+        answers = []
+        stats = self.stats
+        for lo, hi, x in zip(np.asarray(l).tolist(), np.asarray(r).tolist(),
+                             np.asarray(c).tolist()):
+            answers.append(self._query(lo - 1, hi - 1, x))
+            self._update(lo - 1, hi - 1, x)
+            if stats is not None:
+                stats.end_op(0)
+        return answers
+
+class FrameworkQ3Engine(LazyBlockArray):
+    """Example 3 on the generic core"""
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        super().__init__(values, SqrtUpdate(), SumMax(), block_size, np.uint64, stats, storage)
+
+    def run(self, opt, l, r, c):
+        """Replay columnar operations and return the sum query answers (c is ignored)"""
+        answers = []
+        stats = self.stats
+        for o, lo, hi in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                             np.asarray(r).tolist()):
+            if o == 0:
+                self._update(lo - 1, hi - 1, None)
+            else:
+                answers.append(self._query(lo - 1, hi - 1, None))
+            if stats is not None:
+                stats.end_op(o)
+        return answers
+
+class FrameworkQ4Engine(LazyBlockArray):
+    """Example 4 on the generic core"""
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        super().__init__(values, AddTag(), SortedCount(), block_size, np.int64, stats, storage)
+
+    def run(self, opt, l, r, c):
+        """Replay columnar operations (opt 0 = M, 1 = A) and return the A answers"""
+        answers = []
+        stats = self.stats
+        for o, lo, hi, x in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                                np.asarray(r).tolist(), np.asarray(c).tolist()):
+            if o == 0:
+                self._update(lo - 1, hi - 1, x)
+            else:
+                answers.append(self._query(lo - 1, hi - 1, x))
+            if stats is not None:
+                stats.end_op(o)
+        return answers
+
+FRAMEWORK_ENGINES = {1: FrameworkQ1Engine, 2: FrameworkQ2Engine, 3: FrameworkQ3Engine,
+                     4: FrameworkQ4Engine}
+
+def main():
+    """Solve a Q1-Q4 input with the generic core: block_framework.py PROBLEM [INPUT]"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('1', '2', '3', '4'):
+        print(main.__doc__, file=sys.stderr)
+        return 2
+    problem = int(sys.argv[1])
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    values, opt, l, r, c = load_input(path, problem)
+    answers = FRAMEWORK_ENGINES[problem](values).run(opt, l, r, c)
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
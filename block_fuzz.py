@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Differential fuzzing of the Q1-Q4 engines against the NumPy oracles.
+Generated workloads run through an engine and its oracle in lockstep; the
+first operation whose answer, resulting array or exception differs is
+reported, and the failing case is shrunk (fewer operations, shorter array)
+to a minimal counterexample written in the problem's input format. Q1-Q3
+inputs have exactly n operations, so their cases keep q == n throughout.
+"""
+
+import argparse
+
+import numpy as np
+
+from bench_blocks import BACKENDS
+from block_oracle import ORACLES
+from gen_workload import HAS_Q, MODES, _format_ops, make_workload
+
+# Operations between full-array comparisons (answers are compared after each)
+CHECK_EVERY = 64
+
+def _mismatch(index, op, kind, expected, got):
+    return {'index': index, 'op': op, 'kind': kind, 'expected': expected, 'got': got}
+
+def _replay(engine, oracle, ops, start, stop, check_every):
+    """Advance both over ops[start:stop]; return the first mismatch or None"""
+    opt, l, r, c = ops
+    for i in range(start, stop):
+        op = (int(opt[i]), int(l[i]), int(r[i]), int(c[i]))
+        expected = oracle.run(opt[i:i + 1], l[i:i + 1], r[i:i + 1], c[i:i + 1])
+        try:
+            got = engine.run(opt[i:i + 1], l[i:i + 1], r[i:i + 1], c[i:i + 1])
+        except Exception as e:
+            return _mismatch(i, op, 'error', expected, f"{type(e).__name__}: {e}")
+        if list(got) != expected:
+            return _mismatch(i, op, 'answer', expected, list(got))
+        if check_every and ((i + 1) % check_every == 0 or i + 1 == stop):
+            want = oracle.to_array()
+            have = engine.to_array()
+            if not np.array_equal(want, have):
+                return _mismatch(i, op, 'state', want, have)
+    return None
+
+def first_mismatch(engine_cls, oracle_cls, values, ops, block_size=None, check_every=CHECK_EVERY):
+    """
+    Run an engine and its oracle in lockstep over columnar ops and return the
+    first mismatching operation as a dict (index, op, kind, expected, got), or
+    None. Array states are compared every check_every operations; a state
+    mismatch is then pinned to its operation by replaying that stretch.
+    """
+    def fresh():
+        try:
+            return engine_cls(values.copy(), block_size), oracle_cls(values)
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+
+    engine, oracle = fresh()
+    if engine is None:
+        return _mismatch(-1, None, 'error', None, oracle)
+    found = _replay(engine, oracle, ops, 0, len(ops[0]), check_every)
+    if found is None or found['kind'] != 'state' or check_every == 1:
+        return found
+    # The state diverged somewhere after the previous full comparison
+    start = found['index'] // check_every * check_every
+    engine, oracle = fresh()
+    _replay(engine, oracle, ops, 0, start, 0)
+    return _replay(engine, oracle, ops, start, found['index'] + 1, 1)
+
+def _take(ops, keep):
+    return tuple(col[keep] for col in ops)
+
+def pad_ops(problem, n, ops):
+    """
+    Extend a Q1-Q3 case to its n operations with ones that leave the array
+    unchanged: point / sum queries of a_1 for Q1 / Q3, and for Q2 repeats of
+    the last count-assign (its range already holds c).
+    """
+    k = n - len(ops[0])
+    if problem in HAS_Q or k <= 0:
+        return ops
+    if problem == 2:
+        fill = tuple(np.repeat(col[-1:], k) for col in ops)
+    else:
+        fill = (np.full(k, 2 if problem == 1 else 1), np.ones(k, dtype=np.int64),
+                np.ones(k, dtype=np.int64), np.zeros(k, dtype=np.int64))
+    return tuple(np.concatenate((col, f)) for col, f in zip(ops, fill))
+
+def _truncate(problem, values, ops, lo, hi):
+    """Restrict a case to positions [lo, hi) (0-based), clamping and shifting ranges"""
+    values = values[lo:hi]
+    opt, l, r, c = ops
+    m = hi - lo
+    l = np.clip(l - lo, 1, m)
+    r = np.clip(r - lo, 1, m)
+    return values, (opt, np.minimum(l, r), r, c)
+
+def shrink(fails, problem, values, ops, found):
+    """
+    Greedily shrink a failing case: drop everything after the first mismatch,
+    remove runs of operations (halving the run length down to one), then cut
+    the array from either end. fails(values, ops) returns a mismatch or None;
+    for Q1-Q3 it sees ops padded to n (pad_ops) and the array is never cut
+    below the operation count. Returns the smallest (values, ops, mismatch)
+    found, with ops unpadded.
+    """
+    ops = _take(ops, slice(0, found['index'] + 1))
+    progress = True
+    while progress:
+        progress = False
+        # Remove runs of operations
+        size = max(1, len(ops[0]) // 2)
+        while size >= 1:
+            start = 0
+            while start < len(ops[0]) and len(ops[0]) > 1:
+                keep = np.ones(len(ops[0]), dtype=bool)
+                keep[start:start + size] = False
+                candidate = _take(ops, keep)
+                result = fails(values, candidate)
+                if result is not None:
+                    ops = _take(candidate, slice(0, result['index'] + 1))
+                    found = result
+                    progress = True
+                else:
+                    start += size
+            size //= 2
+        # Cut the array from the end, then from the front
+        n = len(values)
+        cut = n // 2
+        while cut >= 1 and len(values) > 1:
+            n = len(values)
+            for lo, hi in ((0, n - cut), (cut, n)):
+                if hi - lo < 1 or (problem not in HAS_Q and hi - lo < len(ops[0])):
+                    continue
+                v, candidate = _truncate(problem, values, ops, lo, hi)
+                result = fails(v, candidate)
+                if result is not None:
+                    values = v
+                    ops = _take(candidate, slice(0, result['index'] + 1))
+                    found = result
+                    progress = True
+                    break
+            else:
+                cut //= 2
+    return values, ops, found
+
+def format_case(problem, values, ops):
+    """Render a case in the problem's input format (Q1-Q3 cases need q == n)"""
+    n = len(values)
+    if problem not in HAS_Q and len(ops[0]) != n:
+        raise ValueError(f"Q{problem} cases have exactly n = {n} operations, not {len(ops[0])}")
+    head = f"{n} {len(ops[0])}\n" if problem in HAS_Q else f"{n}\n"
+    return head + ' '.join(map(str, np.asarray(values).tolist())) + '\n' + _format_ops(problem, *ops)
+
+def fuzz(problem, engine_cls, runs=100, max_n=64, ops=None, seed=0, block_size=None,
+         check_every=CHECK_EVERY):
+    """
+    Fuzz one engine over generated workloads: random n in [1, max_n], every
+    generator mode of the problem, random query share and range span. Q1-Q3
+    workloads have n operations; ops (default random up to 2n + 1) only sets
+    Q4's. Returns None if all runs agree, else (values, ops, mismatch) shrunk
+    to a minimal case in the input format's shape.
+    """
+    oracle_cls = ORACLES[problem]
+    modes = [mode for mode, problems in MODES.items() if problem in problems]
+    rng = np.random.default_rng(seed)
+    for run in range(runs):
+        n = int(rng.integers(1, max_n + 1))
+        q = (ops or int(rng.integers(1, 2 * n + 2))) if problem in HAS_Q else n
+        mode = modes[run % len(modes)]
+        values, case = make_workload(problem, n, q, mode, seed=int(rng.integers(1 << 31)),
+                                     query=float(rng.uniform(0.1, 0.9)),
+                                     span=float(rng.choice([0.05, 0.3, 1.0])),
+                                     block_size=block_size)
+
+        def fails(v, o):
+            return first_mismatch(engine_cls, oracle_cls, v, pad_ops(problem, len(v), o),
+                                  block_size, check_every)
+
+        found = fails(values, case)
+        if found is not None:
+            if found['index'] < 0:
+                return values, case, found
+            values, case, found = shrink(fails, problem, values, case, found)
+            return values, pad_ops(problem, len(values), case), found
+    return None
+
+def main():
+    """Fuzz Q1-Q4 engines against the oracle; exit 1 on the first counterexample"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('problem', type=int, choices=sorted(ORACLES))
+    parser.add_argument('--engine', action='append', default=None,
+                        help='engine name as in bench_blocks.py (repeatable; default: all)')
+    parser.add_argument('--runs', type=int, default=100, help='workloads per engine')
+    parser.add_argument('--max-n', type=int, default=64)
+    parser.add_argument('--ops', type=int, default=None,
+                        help='operations per Q4 workload (default: random up to 2n + 1; '
+                             'Q1-Q3 always have n)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--block-size', type=int, default=None)
+    parser.add_argument('--check-every', type=int, default=CHECK_EVERY,
+                        help='operations between full-array comparisons')
+    parser.add_argument('-o', '--output', default=None,
+                        help='write the minimal counterexample to this input file')
+    args = parser.parse_args()
+
+    engines = BACKENDS[args.problem]
+    names = args.engine or sorted(engines)
+    for name in names:
+        if name not in engines:
+            parser.error(f"unknown engine {name!r} for Q{args.problem}")
+    for name in names:
+        result = fuzz(args.problem, engines[name], args.runs, args.max_n, args.ops, args.seed,
+                      args.block_size, args.check_every)
+        if result is None:
+            print(f"Q{args.problem} {name}: {args.runs} workloads agree with the oracle")
+            continue
+        values, ops, found = result
+        case = format_case(args.problem, values, ops)
+        print(f"Q{args.problem} {name}: mismatch at operation {found['index'] + 1} "
+              f"{found['op']} ({found['kind']})")
+        print(f"  expected: {found['expected']}")
+        print(f"  got:      {found['got']}")
+        print(case, end='')
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(case)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Zero-copy bulk parser for the Q1-Q4 input formats.
+The input file is memory-mapped and tokenized directly as a NumPy byte array
+into typed columns (values, opt, l, r, c/h/k) without building per-line
+Python strings. InputStream parses in bounded windows, so files larger than
+RAM can be streamed chunk by chunk.
+"""
+
+import mmap
+import os
+import sys
+
+import numpy as np
+
+# Bytes of input tokenized per window (small windows stay cache-resident)
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+# Tokens per operation line
+OP_WIDTH = {1: 4, 2: 3, 3: 3, 4: 4}
+
+# Q4 operation letters -> opt codes (-1 marks an unknown letter)
+OP_LETTERS = {'M': 0, 'A': 1}
+_OPT_CODES = np.full(256, -1, dtype=np.int8)
+for _letter, _code in OP_LETTERS.items():
+    _OPT_CODES[ord(_letter)] = _code
+
+_MINUS = ord('-')
+_ZERO = ord('0')
+
+def parse_ints(buf, starts, ends, signed=True):
+    """
+    Convert the tokens buf[starts[i]:ends[i]] to integers, one vectorized
+    Horner step per digit position. Unsigned results are exact over uint64.
+    Raises ValueError on a token that is not an optional '-' followed by
+    decimal digits.
+    """
+    neg = buf[starts] == _MINUS
+    first = starts + neg
+    lengths = ends - first
+    bad = lengths <= 0
+    val = np.zeros(len(starts), dtype=np.uint64)
+    last = len(buf) - 1
+    ten = np.uint64(10)
+    for k in range(int(lengths.max()) if len(lengths) else 0):
+        digit = buf[np.minimum(first + k, last)].astype(np.uint64) - np.uint64(_ZERO)
+        live = lengths > k
+        bad |= live & (digit > 9)
+        np.copyto(val, val * ten + digit, where=live)
+    if bad.any():
+        i = int(np.flatnonzero(bad)[0])
+        token = bytes(buf[starts[i]:ends[i]]).decode('latin-1')
+        raise ValueError(f"malformed integer token {token!r}")
+    if not signed:
+        return val
+    val = val.view(np.int64)
+    np.negative(val, out=val, where=neg)
+    return val
+
+class InputStream:
+    """Windowed tokenizer over a memory-mapped (or in-memory) Q1-Q4 input"""
+
+    def __init__(self, source, problem, chunk_bytes=DEFAULT_CHUNK_BYTES):
+        self.problem = problem
+        self.chunk_bytes = chunk_bytes
+        self._file = None
+        self._map = None
+        if isinstance(source, (str, os.PathLike)):
+            self._file = open(source, 'rb')
+            if os.fstat(self._file.fileno()).st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.buf = np.frombuffer(self._map, dtype=np.uint8)
+            else:
+                self.buf = np.zeros(0, dtype=np.uint8)
+        else:
+            self.buf = np.frombuffer(source, dtype=np.uint8)
+        self.pos = 0
+
+        header = []
+        while len(header) < (2 if problem == 4 else 1):
+            starts, ends = self._next_tokens(1)
+            if not len(starts):
+                raise ValueError("missing header")
+            header += parse_ints(self.buf, starts, ends).tolist()
+        self.n = header[0]
+        self.q = header[1] if problem == 4 else self.n
+        self._values_read = 0
+        self._ops_read = 0
+
+    def close(self):
+        """Release the memory map"""
+        self.buf = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_tokens(self, max_tokens, multiple=1):
+        """
+        Return (starts, ends) of the next complete tokens from one window,
+        at most max_tokens and a multiple of `multiple` of them.
+        """
+        buf = self.buf
+        size = len(buf)
+        chunk = self.chunk_bytes
+        while True:
+            stop = min(self.pos + chunk, size)
+            window = buf[self.pos:stop] > 32
+            edges = np.diff(window.view(np.int8), prepend=0, append=0)
+            starts = np.flatnonzero(edges == 1)
+            ends = np.flatnonzero(edges == -1)
+            if stop < size and len(ends) and ends[-1] == stop - self.pos:
+                # The last token may continue past the window
+                starts = starts[:-1]
+                ends = ends[:-1]
+            count = min(len(starts), max_tokens)
+            count -= count % multiple
+            if count or stop == size:
+                break
+            chunk *= 2
+        starts = starts[:count] + self.pos
+        ends = ends[:count] + self.pos
+        if count:
+            self.pos = int(ends[-1])
+        return starts, ends
+
+    def read_values(self, out=None):
+        """
+        Parse the n initial values into out (allocated when None; may be any
+        writable array such as a np.memmap) and return it.
+        """
+        signed = self.problem != 3
+        if out is None:
+            out = np.empty(self.n, dtype=np.int64 if signed else np.uint64)
+        while self._values_read < self.n:
+            starts, ends = self._next_tokens(self.n - self._values_read)
+            if not len(starts):
+                raise ValueError(f"expected {self.n} values, found {self._values_read}")
+            k = len(starts)
+            out[self._values_read:self._values_read + k] = parse_ints(self.buf, starts, ends, signed)
+            self._values_read += k
+        return out
+
+    def iter_ops(self):
+        """Yield the operations as (opt, l, r, c) column chunks"""
+        if self._values_read < self.n:
+            # Skip over the values without keeping them
+            while self._values_read < self.n:
+                starts, _ = self._next_tokens(self.n - self._values_read)
+                if not len(starts):
+                    raise ValueError(f"expected {self.n} values, found {self._values_read}")
+                self._values_read += len(starts)
+        width = OP_WIDTH[self.problem]
+        while self._ops_read < self.q:
+            starts, ends = self._next_tokens((self.q - self._ops_read) * width, width)
+            if not len(starts):
+                raise ValueError(f"expected {self.q} operations, found {self._ops_read}")
+            self._ops_read += len(starts) // width
+            yield self._columns(starts.reshape(-1, width), ends.reshape(-1, width))
+
+    def _columns(self, starts, ends):
+        """Turn a (rows, width) token table into typed opt, l, r, c columns"""
+        buf = self.buf
+        problem = self.problem
+        rows = len(starts)
+        if problem == 4:
+            # Letter-prefixed lines: M l r h / A l r k
+            opt = _OPT_CODES[buf[starts[:, 0]]]
+            if (opt < 0).any():
+                raise ValueError("unknown operation letter")
+        elif problem == 2:
+            opt = np.zeros(rows, dtype=np.int8)
+        else:
+            opt = parse_ints(buf, starts[:, 0], ends[:, 0]).astype(np.int8)
+        first = 0 if problem == 2 else 1
+        l = parse_ints(buf, starts[:, first], ends[:, first]).astype(np.int32)
+        r = parse_ints(buf, starts[:, first + 1], ends[:, first + 1]).astype(np.int32)
+        if problem == 3:
+            c = np.zeros(rows, dtype=np.int64)
+        else:
+            c = parse_ints(buf, starts[:, first + 2], ends[:, first + 2])
+        return opt, l, r, c
+
+def parse_input(source, problem, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Parse a whole Q1-Q4 input (path or bytes) into (values, opt, l, r, c)"""
+    stream = InputStream(source, problem, chunk_bytes)
+    try:
+        values = stream.read_values()
+        chunks = list(stream.iter_ops())
+    finally:
+        stream.close()
+    if not chunks:
+        empty = np.zeros(0, dtype=np.int64)
+        return values, empty.astype(np.int8), empty.astype(np.int32), empty.astype(np.int32), empty
+    return (values,) + tuple(np.concatenate(col) for col in zip(*chunks))
+
+def main():
+    """Parse a Q1-Q4 input file and report its shape"""
+    if len(sys.argv) < 3:
+        print(f"usage: {sys.argv[0]} <problem 1-4> <input>")
+        return 1
+    values, opt, l, r, c = parse_input(sys.argv[2], int(sys.argv[1]))
+    print(f"n = {len(values)}, operations = {len(opt)}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
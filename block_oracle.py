@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reference implementations of Examples 1-4 for differential testing.
+Each oracle keeps the plain array and applies every operation as one NumPy
+slice expression: no blocks, tags or skip structures, so it shares no code
+path with the engines it checks. Same interface as the engines
+(run(opt, l, r, c) and to_array()); O(n) per operation, which is still fast
+enough to replay 10^5 operations over n = 10^5.
+"""
+
+import sys
+
+import numpy as np
+
+from block_common import load_input
+
+# Modulus of Example 1 (LOJ 6283)
+MOD = 10007
+
+# Largest r with r² < 2^64
+SQRT_MAX = (1 << 32) - 1
+
+def floor_sqrt(x):
+    """Exact floor(√x) of a uint64 array (float estimate, then fixed up by ±1)"""
+    s = np.minimum(np.sqrt(x.astype(np.float64)).astype(np.uint64), np.uint64(SQRT_MAX))
+    s -= (s * s > x).astype(np.uint64)
+    up = (s < SQRT_MAX) & ((s + np.uint64(1)) * (s + np.uint64(1)) <= x)
+    return s + up.astype(np.uint64)
+
+def exact_total(x):
+    """Exact Python-int sum of a uint64 array (halves summed separately, no overflow)"""
+    hi = int((x >> np.uint64(32)).sum(dtype=np.uint64))
+    lo = int((x & np.uint64(0xFFFFFFFF)).sum(dtype=np.uint64))
+    return (hi << 32) + lo
+
+class Q1Oracle:
+    """Example 1: opt 0 adds c, opt 1 multiplies by c on [l, r], opt 2 asks a_r mod MOD"""
+
+    def __init__(self, values, block_size=None):
+        self.a = np.asarray(values, dtype=np.int64) % MOD
+
+    def run(self, opt, l, r, c):
+        a = self.a
+        answers = []
+        for o, lo, hi, x in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                                np.asarray(r).tolist(), np.asarray(c).tolist()):
+            if o == 2:
+                answers.append(int(a[hi - 1]))
+                continue
+            seg = a[lo - 1:hi]
+            if o == 0:
+                seg += x % MOD
+            else:
+                seg *= x % MOD
+            seg %= MOD
+        return answers
+
+    def to_array(self):
+        return self.a.copy()
+
+class Q2Oracle:
+    """Example 2: count a_i == c on [l, r], then assign c to [l, r]"""
+
+    def __init__(self, values, block_size=None):
+        self.a = np.array(values, dtype=np.int64)
+
+    def run(self, opt, l, r, c):
+        a = self.a
+        answers = []
+        for lo, hi, x in zip(np.asarray(l).tolist(), np.asarray(r).tolist(),
+                             np.asarray(c).tolist()):
+            seg = a[lo - 1:hi]
+            answers.append(int(np.count_nonzero(seg == x)))
+            seg[:] = x
+        return answers
+
+    def to_array(self):
+        return self.a.copy()
+
+class Q3Oracle:
+    """Example 3: opt 0 replaces a_i by floor(√a_i) on [l, r], opt 1 asks the sum"""
+
+    def __init__(self, values, block_size=None):
+        self.a = np.array(values, dtype=np.uint64)
+
+    def run(self, opt, l, r, c):
+        a = self.a
+        answers = []
+        for o, lo, hi in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                             np.asarray(r).tolist()):
+            seg = a[lo - 1:hi]
+            if o == 0:
+                # 0 and 1 are fixed points; ranges of them need no arithmetic
+                if (seg > 1).any():
+                    seg[:] = floor_sqrt(seg)
+            else:
+                answers.append(exact_total(seg))
+        return answers
+
+    def to_array(self):
+        return self.a.copy()
+
+class Q4Oracle:
+    """Example 4: opt 0 (M) adds c to [l, r], opt 1 (A) counts a_i >= c"""
+
+    def __init__(self, values, block_size=None):
+        self.a = np.array(values, dtype=np.int64)
+
+    def run(self, opt, l, r, c):
+        a = self.a
+        answers = []
+        for o, lo, hi, x in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                                np.asarray(r).tolist(), np.asarray(c).tolist()):
+            if o == 0:
+                a[lo - 1:hi] += x
+            else:
+                answers.append(int(np.count_nonzero(a[lo - 1:hi] >= x)))
+        return answers
+
+    def to_array(self):
+        return self.a.copy()
+
+ORACLES = {1: Q1Oracle, 2: Q2Oracle, 3: Q3Oracle, 4: Q4Oracle}
+
+def main():
+    """Answer a Q1-Q4 input with the reference oracle: block_oracle.py PROBLEM [INPUT]"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('1', '2', '3', '4'):
+        print(main.__doc__, file=sys.stderr)
+        return 2
+    problem = int(sys.argv[1])
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    values, opt, l, r, c = load_input(path, problem)
+    answers = ORACLES[problem](values).run(opt, l, r, c)
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-process execution of whole-block work for the block engines.
+Element planes (and plain metadata) live in multiprocessing.shared_memory
+segments; a process pool square-roots the live blocks of a long Example 3
+sweep and answers batches of consecutive Example 4 count queries, with each
+long query split at block boundaries. Answers are identical to the serial
+engines: workers run the same exact integer kernels on the same buffers.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from block_common import load_input
+from block_storage import BlockStorage
+from q3_engine import Q3BlockEngine, exact_sum, isqrt_u64
+from q4_engine import Q4BlockEngine, count_range, count_sorted
+
+class SharedBlockStorage(BlockStorage):
+    """BlockStorage whose planes and numeric metadata are shared memory segments"""
+
+    def __init__(self, n, block_size):
+        super().__init__(n, block_size)
+        self.segments = []
+        # name -> (segment name, dtype, shape), for workers to attach
+        self.layout = {}
+
+    def _shared(self, name, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        self.segments.append(shm)
+        self.layout[name] = (shm.name, dtype.str, shape)
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def _allocate(self, name, length, dtype):
+        return self._shared(name, length, dtype)
+
+    def add_meta(self, name, dtype, fill=0, width=None):
+        # Python-int (object) metadata cannot be shared; workers never need it
+        if np.dtype(dtype) == object:
+            return super().add_meta(name, dtype, fill, width)
+        arr = self._shared(name, self.nblocks if width is None else (self.nblocks, width), dtype)
+        arr[:] = fill
+        self.meta[name] = arr
+        return arr
+
+    def retype(self, name, dtype):
+        if name in self.meta and np.dtype(dtype) != object:
+            old = self.meta[name]
+            arr = self.add_meta(name, dtype, width=old.shape[1] if old.ndim == 2 else None)
+            arr[:] = old
+            return arr
+        return super().retype(name, dtype)
+
+    def close(self):
+        """Release and unlink every segment (arrays must no longer be used)"""
+        self.planes.clear()
+        self.meta.clear()
+        for shm in self.segments:
+            shm.close()
+            shm.unlink()
+        self.segments = []
+        self.layout = {}
+
+# Worker side: segments attached so far, by segment name
+_ATTACHED = {}
+
+def _attach(spec):
+    """ndarray over a shared segment described by (name, dtype, shape)"""
+    name, dtype, shape = spec
+    entry = _ATTACHED.get(name)
+    if entry is None:
+        # The parent owns the segment and unlinks it in close()
+        shm = shared_memory.SharedMemory(name=name)
+        entry = _ATTACHED[name] = (shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+    return entry[1]
+
+def _sqrt_blocks(spec, block_size, blocks):
+    """Square-root whole blocks in place; return their new sums and maxima"""
+    a = _attach(spec)
+    sums = []
+    maxes = []
+    for b in blocks:
+        seg = a[b * block_size:(b + 1) * block_size]
+        seg[:] = isqrt_u64(seg)
+        sums.append(exact_sum(seg))
+        maxes.append(int(seg.max()))
+    return sums, maxes
+
+def _count_ranges(layout, block_size, low, high, ranges):
+    """
+    Q4 counts of heights >= k on 0-based (l, r, k) ranges with the serial
+    engine's kernel; [low, high] bounds the stored heights.
+    """
+    values = _attach(layout['values'])
+    add = _attach(layout['add'])
+    store = BlockStorage(len(values), block_size)
+    store.planes = {'values': values, 'sorted': _attach(layout['sorted'])}
+    count_whole = partial(count_sorted, store, add, low, high)
+    return [count_range(store, add, l, r, k, count_whole) for l, r, k in ranges]
+
+def _split(items, parts):
+    """Split a list into at most `parts` contiguous, non-empty chunks"""
+    size = -(-len(items) // parts)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+class _PoolMixin:
+    """Process pool lifecycle shared by the parallel engines"""
+
+    def _start_pool(self, workers, min_blocks):
+        self.workers = workers or os.cpu_count() or 1
+        # Below this many whole blocks an operation stays in this process
+        self.min_blocks = min_blocks or 8 * self.workers
+        self.pool = ProcessPoolExecutor(self.workers)
+
+    def close(self):
+        """Stop the pool and release the shared memory"""
+        self.pool.shutdown()
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ParallelQ3Engine(_PoolMixin, Q3BlockEngine):
+    """Q3BlockEngine whose long sqrt sweeps are split across a process pool"""
+
+    def __init__(self, values, block_size=None, workers=None, min_blocks=None):
+        super().__init__(values, block_size, storage=SharedBlockStorage)
+        self._start_pool(workers, min_blocks)
+
+    def _sqrt_whole(self, wl, wr):
+        """Square-root every live block in wl..wr, in parallel when there are many"""
+        find = self._find
+        live = []
+        b = find(wl)
+        while b <= wr:
+            live.append(b)
+            b = find(b + 1)
+        if len(live) < self.min_blocks:
+            super()._sqrt_whole(wl, wr)
+            return
+        spec = self.store.layout['values']
+        chunks = _split(live, self.workers)
+        futures = [self.pool.submit(_sqrt_blocks, spec, self.block_size, chunk)
+                   for chunk in chunks]
+        sums = self.sums
+        maxes = self.max
+        nxt = self.nxt
+        for chunk, future in zip(chunks, futures):
+            chunk_sums, chunk_maxes = future.result()
+            for b, s, m in zip(chunk, chunk_sums, chunk_maxes):
+                sums[b] = s
+                maxes[b] = m
+                if m <= 1:
+                    nxt[b] = b + 1
+
+class ParallelQ4Engine(_PoolMixin, Q4BlockEngine):
+    """
+    Q4BlockEngine that pipelines every run of consecutive count queries through
+    a process pool; a query spanning many blocks is split at block boundaries.
+    """
+
+    def __init__(self, values, block_size=None, workers=None, min_blocks=None):
+        super().__init__(values, block_size, storage=SharedBlockStorage)
+        self._start_pool(workers, min_blocks)
+
+    def _pieces(self, l, r, k):
+        """Split a 0-based query into block-aligned ranges of about min_blocks blocks"""
+        B = self.block_size
+        span = self.min_blocks * B
+        pieces = []
+        start = l
+        while start <= r:
+            stop = min(r, (start // B) * B + span - 1)
+            pieces.append((start, stop, k))
+            start = stop + 1
+        return pieces
+
+    def _count_batch(self, queries):
+        """Answer independent 0-based (l, r, k) queries in the pool, in order"""
+        B = self.block_size
+        if sum(r // B - l // B + 1 for l, r, k in queries) < self.min_blocks:
+            count = self._count
+            return [count(l, r, k) for l, r, k in queries]
+        pieces = []
+        owner = []
+        for i, (l, r, k) in enumerate(queries):
+            for piece in self._pieces(l, r, k):
+                pieces.append(piece)
+                owner.append(i)
+        layout = self.store.layout
+        # A few tasks per worker, each a list of pieces
+        per_task = max(1, len(pieces) // (4 * self.workers))
+        futures = [self.pool.submit(_count_ranges, layout, B, self.low, self.high,
+                                    pieces[i:i + per_task])
+                   for i in range(0, len(pieces), per_task)]
+        answers = [0] * len(queries)
+        pos = 0
+        for future in futures:
+            for count in future.result():
+                answers[owner[pos]] += count
+                pos += 1
+        return answers
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays (opt 0 = M,
+        opt 1 = A) and return the answers of the A queries in order.
+        """
+        answers = []
+        batch = []
+        grow = self._grow
+        for o, lo, hi, x in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                                np.asarray(r).tolist(), np.asarray(c).tolist()):
+            if o == 0:
+                if batch:
+                    answers.extend(self._count_batch(batch))
+                    batch = []
+                grow(lo - 1, hi - 1, x)
+            else:
+                batch.append((lo - 1, hi - 1, x))
+        if batch:
+            answers.extend(self._count_batch(batch))
+        return answers
+
+PARALLEL_ENGINES = {3: ParallelQ3Engine, 4: ParallelQ4Engine}
+
+def main():
+    """Solve a Q3/Q4 input in parallel and print the answers (timing on stderr)"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('problem', type=int, choices=sorted(PARALLEL_ENGINES))
+    parser.add_argument('input', nargs='?', default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--block-size', type=int, default=None)
+    parser.add_argument('--min-blocks', type=int, default=None,
+                        help='whole blocks below which an operation runs serially')
+    args = parser.parse_args()
+
+    values, opt, l, r, c = load_input(args.input, args.problem)
+    start = time.perf_counter()
+    with PARALLEL_ENGINES[args.problem](values, args.block_size, args.workers,
+                                        args.min_blocks) as engine:
+        answers = engine.run(opt, l, r, c)
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    print(f"{len(opt)} operations in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
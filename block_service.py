@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio query service in front of the Q1-Q4 block engines.
+Clients send one operation per line in the problem's input format over TCP
+or a Unix socket and get one response line per operation, in order (the
+answer of a query, "ok" for an update). Requests arriving within a short
+window are merged into one batch and applied with a single engine.run()
+call. The line "stats" returns backpressure and latency metrics as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from block_autotune import ENGINES
+from block_input import OP_LETTERS, OP_WIDTH, InputStream
+
+# Operation codes that produce an answer, per problem
+QUERY_OPS = {1: (2,), 2: (0,), 3: (1,), 4: (1,)}
+
+# Latencies kept for the percentile report
+LATENCY_WINDOW = 10000
+
+# Operands are batched into int64 columns
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+def parse_op(problem, line, n):
+    """
+    Parse one operation line into (opt, l, r, c); raise ValueError if invalid.
+    Every operation that passes is one the engines apply without raising, so a
+    batch never fails part-way because of one client's input.
+    """
+    tokens = line.split()
+    if len(tokens) != OP_WIDTH[problem]:
+        raise ValueError(f"expected {OP_WIDTH[problem]} fields, got {len(tokens)}")
+    if problem == 4:
+        if tokens[0] not in OP_LETTERS:
+            raise ValueError(f"unknown operation {tokens[0]!r}")
+        opt, l, r, c = OP_LETTERS[tokens[0]], int(tokens[1]), int(tokens[2]), int(tokens[3])
+    elif problem == 2:
+        opt, l, r, c = 0, int(tokens[0]), int(tokens[1]), int(tokens[2])
+    elif problem == 3:
+        opt, l, r, c = int(tokens[0]), int(tokens[1]), int(tokens[2]), 0
+    else:
+        opt, l, r, c = int(tokens[0]), int(tokens[1]), int(tokens[2]), int(tokens[3])
+    if problem in (1, 3) and opt not in ((0, 1, 2) if problem == 1 else (0, 1)):
+        raise ValueError(f"unknown operation {opt}")
+    if not 1 <= r <= n or not (1 <= l <= r or (problem == 1 and opt == 2)):
+        raise ValueError(f"range [{l}, {r}] outside 1..{n}")
+    if not INT64_MIN <= l <= INT64_MAX or not INT64_MIN <= c <= INT64_MAX:
+        raise ValueError("operand outside the signed 64-bit range")
+    return opt, l, r, c
+
+class MicroBatcher:
+    """
+    Collects operations from all clients and applies them in arrival order,
+    one engine.run() per batch. A batch closes window seconds after its first
+    operation or when it reaches max_batch operations.
+    """
+
+    def __init__(self, problem, engine, window=0.002, max_batch=4096, max_pending=65536):
+        self.problem = problem
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.queries = QUERY_OPS[problem]
+        # Operations accepted but not yet answered; submit() waits when full
+        self.slots = asyncio.Semaphore(max_pending)
+        self.max_pending = max_pending
+        self.pending = 0
+        self.batch = []
+        self.timer = None
+        # Engine calls run one at a time, off the event loop
+        self.executor = ThreadPoolExecutor(1)
+        self.running = asyncio.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.backpressure_waits = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    async def submit(self, op):
+        """Queue one operation; the returned future resolves to its response"""
+        if self.slots.locked():
+            self.backpressure_waits += 1
+        await self.slots.acquire()
+        self.pending += 1
+        self.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        self.batch.append((op, future, time.perf_counter()))
+        if len(self.batch) >= self.max_batch:
+            self._close_batch()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self._close_batch)
+        return future
+
+    def _close_batch(self):
+        """Hand the open batch to the engine and start a new one"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.batch:
+            batch, self.batch = self.batch, []
+            asyncio.ensure_future(self._apply(batch))
+
+    async def _apply(self, batch):
+        """Run one batch through engine.run() and resolve its futures in order"""
+        ops = [op for op, _, _ in batch]
+        opt, l, r, c = (np.array(col, dtype=np.int64) for col in zip(*ops))
+        async with self.running:
+            try:
+                answers = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.engine.run, opt, l, r, c)
+            except Exception as e:
+                answers = e
+        self.batches += 1
+        done = time.perf_counter()
+        pos = 0
+        for (op, future, start), o in zip(batch, opt.tolist()):
+            if isinstance(answers, Exception):
+                future.set_result(f"error: {answers}")
+            elif o in self.queries:
+                future.set_result(str(answers[pos]))
+                pos += 1
+            else:
+                future.set_result("ok")
+            self.latencies.append(done - start)
+            self.pending -= 1
+            self.slots.release()
+
+    def metrics(self):
+        """Counters, backpressure state and latency percentiles (ms)"""
+        lat = np.array(self.latencies) * 1000
+        percentiles = {f"p{p}": round(float(np.percentile(lat, p)), 3) if len(lat) else None
+                       for p in (50, 90, 99)}
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch': round(self.requests / self.batches, 2) if self.batches else 0,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'backpressure_waits': self.backpressure_waits,
+            'latency_ms': percentiles,
+        }
+
+class BlockService:
+    """Line-protocol front end: one connection handler per client"""
+
+    def __init__(self, batcher, n):
+        self.batcher = batcher
+        self.n = n
+
+    async def handle(self, reader, writer):
+        """Read operations from one client and answer them in its order"""
+        responses = asyncio.Queue()
+        sender = asyncio.ensure_future(self._send(responses, writer))
+        try:
+            await self._receive(reader, responses)
+            await responses.put(None)
+            await sender
+        except (ConnectionError, asyncio.CancelledError):
+            # Client gone or server shutting down: drop its pending responses
+            sender.cancel()
+        finally:
+            writer.close()
+
+    async def _receive(self, reader, responses):
+        """Parse and submit a client's operations, queueing their responses"""
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                text = line.decode().strip()
+            except UnicodeDecodeError as e:
+                await responses.put(f"error: {e}")
+                continue
+            if not text:
+                continue
+            if text == 'stats':
+                await responses.put(json.dumps(self.batcher.metrics()))
+                continue
+            try:
+                op = parse_op(self.batcher.problem, text, self.n)
+            except ValueError as e:
+                await responses.put(f"error: {e}")
+                continue
+            await responses.put(await self.batcher.submit(op))
+
+    async def _send(self, responses, writer):
+        """Write responses (strings or futures) in submission order"""
+        while True:
+            item = await responses.get()
+            if item is None:
+                break
+            if not isinstance(item, str):
+                item = await item
+            writer.write(item.encode() + b"\n")
+            if responses.empty():
+                await writer.drain()
+
+async def serve(args):
+    """Load the initial array and serve until cancelled"""
+    with InputStream(args.input, args.problem) as stream:
+        values = stream.read_values()
+    engine = ENGINES[args.problem](values, block_size=args.block_size)
+    batcher = MicroBatcher(args.problem, engine, args.window_ms / 1000, args.max_batch,
+                           args.max_pending)
+    service = BlockService(batcher, len(values))
+    if args.unix:
+        server = await asyncio.start_unix_server(service.handle, path=args.unix)
+        where = args.unix
+    else:
+        server = await asyncio.start_server(service.handle, args.host, args.port)
+        where = f"{args.host}:{args.port}"
+    print(f"Serving Q{args.problem} (n = {len(values)}) on {where}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def main():
+    """Serve a Q1-Q4 engine over TCP or a Unix socket"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('problem', type=int, choices=sorted(ENGINES))
+    parser.add_argument('input', help='input file whose initial array is served')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='serve on this Unix socket path instead')
+    parser.add_argument('--block-size', type=int, default=None)
+    parser.add_argument('--window-ms', type=float, default=2.0,
+                        help='how long a batch stays open after its first request')
+    parser.add_argument('--max-batch', type=int, default=4096)
+    parser.add_argument('--max-pending', type=int, default=65536,
+                        help='operations in flight before clients are slowed down')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
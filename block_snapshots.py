@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Copy-on-write block snapshots for historical queries ("what was a_r after
+operation t"). VersionedBlockStorage shares unchanged blocks between
+versions: the first write to a block after a snapshot saves its old page,
+and block metadata (tags, sums, maxima) keeps per-block change histories.
+SnapshotEngine runs a block engine on it, snapshots after every operation
+and hands out read-only engines for past versions.
+
+Snapshottable engines (SNAPSHOT_ENGINES) keep all their state in a
+BlockStorage with fixed-shape metadata: the Q1-Q4 block engines and the
+block_framework engines. Q2AdaptiveEngine is pinned to its block backend.
+Q2IntervalEngine and Q3FenwickEngine have no block storage, and
+Q4ValueEngine resizes its tables; they are rejected.
+"""
+
+import copy
+from bisect import bisect_left
+
+import numpy as np
+
+from block_framework import FRAMEWORK_ENGINES
+from block_storage import BlockStorage
+from q1_engine import Q1BlockEngine
+from q2_engine import Q2AdaptiveEngine, Q2BlockEngine
+from q3_engine import Q3BlockEngine
+from q4_engine import Q4BlockEngine
+
+# Engine classes SnapshotEngine can run on VersionedBlockStorage
+SNAPSHOT_ENGINES = {Q1BlockEngine, Q2BlockEngine, Q3BlockEngine, Q4BlockEngine,
+                    *FRAMEWORK_ENGINES.values()}
+
+# Engines snapshotted through another class that gives the same answers
+# (the adaptive engine may switch to its interval map, which has no blocks)
+SNAPSHOT_BACKENDS = {Q2AdaptiveEngine: Q2BlockEngine}
+
+def snapshot_class(engine_cls):
+    """The engine class SnapshotEngine runs for engine_cls; TypeError if unsupported"""
+    engine_cls = SNAPSHOT_BACKENDS.get(engine_cls, engine_cls)
+    if engine_cls not in SNAPSHOT_ENGINES:
+        names = sorted(cls.__name__ for cls in SNAPSHOT_ENGINES | set(SNAPSHOT_BACKENDS))
+        raise TypeError(f"{engine_cls.__name__} cannot be snapshotted (supported: {', '.join(names)})")
+    return engine_cls
+
+class VersionedBlockStorage(BlockStorage):
+    """
+    BlockStorage with persistent versions. A snapshot costs O(modified blocks)
+    for element data plus one vectorized compare of the per-block metadata.
+    """
+
+    def __init__(self, n, block_size):
+        super().__init__(n, block_size)
+        self.version = -1
+        # (plane, block) -> (versions, pages): pages[i] is the block's content
+        # at snapshot versions[i], saved just before its first later write
+        self.history = {}
+        self._saved = set()
+        # Per-block metadata histories, same layout: field -> block -> lists
+        self.meta_history = {}
+        self._meta_base = {}
+
+    def writable(self, b, plane='values'):
+        """Block b's elements for writing; saves the snapshot's copy first"""
+        page = self.data(b, plane)
+        key = (plane, b)
+        if self.version >= 0 and key not in self._saved:
+            versions, pages = self.history.setdefault(key, ([], []))
+            versions.append(self.version)
+            pages.append(page.copy())
+            self._saved.add(key)
+        return page
+
+    def snapshot(self):
+        """Freeze the current contents as a new version and return its id"""
+        if self.version >= 0:
+            self._record_meta()
+        self.version += 1
+        self._saved = set()
+        self._meta_base = {name: arr.copy() for name, arr in self.meta.items()}
+        return self.version
+
+    def _record_meta(self):
+        """Save the previous version's value of every metadata entry changed since"""
+        for name, arr in self.meta.items():
+            base = self._meta_base.get(name)
+            if base is None:
+                continue
+            if base.shape != arr.shape:
+                raise ValueError(f"metadata {name!r} was resized; snapshots need fixed shapes")
+            changed = base != arr
+            if changed.ndim > 1:
+                changed = changed.any(axis=1)
+            history = self.meta_history.setdefault(name, {})
+            for b in np.flatnonzero(changed).tolist():
+                versions, values = history.setdefault(b, ([], []))
+                versions.append(self.version)
+                values.append(base[b].copy() if base.ndim > 1 else base[b])
+
+    def page_at(self, b, plane, version):
+        """Block b's elements in a plane as of a snapshot version"""
+        entry = self.history.get((plane, b))
+        if entry is not None:
+            versions, pages = entry
+            i = bisect_left(versions, version)
+            if i < len(versions):
+                return pages[i]
+        return self.data(b, plane)
+
+    def meta_at(self, name, version):
+        """A metadata array as of a snapshot version (a new array)"""
+        # Histories cover every change up to the latest snapshot, whose
+        # contents are _meta_base
+        arr = self._meta_base[name].copy()
+        for b, (versions, values) in self.meta_history.get(name, {}).items():
+            i = bisect_left(versions, version)
+            if i < len(versions):
+                arr[b] = values[i]
+        return arr
+
+    def checkout(self, version):
+        """Read-only storage view of a snapshot version"""
+        if not 0 <= version <= self.version:
+            raise ValueError(f"no snapshot {version} (latest is {self.version})")
+        return HistoricalBlockStorage(self, version)
+
+class HistoricalBlockStorage(BlockStorage):
+    """Read-only view of one version of a VersionedBlockStorage"""
+
+    def __init__(self, source, version):
+        super().__init__(source.n, source.block_size)
+        self.source = source
+        self.version = version
+        for name in source.meta:
+            arr = source.meta_at(name, version)
+            arr.flags.writeable = False
+            self.meta[name] = arr
+
+    def data(self, b, plane='values'):
+        page = self.source.page_at(b, plane, self.version).view()
+        page.flags.writeable = False
+        return page
+
+    def writable(self, b, plane='values'):
+        raise ValueError("historical snapshots are read-only")
+
+    def plane(self, name='values'):
+        """The whole plane as of this version (a new array, O(n))"""
+        if self.nblocks == 0:
+            return self.source.plane(name).copy()
+        return np.concatenate([self.source.page_at(b, name, self.version)
+                               for b in range(self.nblocks)])
+
+def historical_engine(engine, store):
+    """Shallow copy of a block engine bound to a historical storage view"""
+    hist = copy.copy(engine)
+    live = engine.store
+    fields = {id(arr): name for name, arr in live.meta.items()}
+    planes = {id(arr) for arr in live.planes.values()}
+    for attr, value in vars(engine).items():
+        if value is live:
+            setattr(hist, attr, store)
+        elif value is live.meta:
+            setattr(hist, attr, store.meta)
+        elif id(value) in fields:
+            setattr(hist, attr, store.meta[fields[id(value)]])
+        elif id(value) in planes:
+            # Element planes are only reached through store.data() by queries
+            setattr(hist, attr, None)
+    hist.stats = None
+    return hist
+
+class SnapshotEngine:
+    """
+    Runs a block engine on VersionedBlockStorage and snapshots after every
+    operation; at(t) is the engine as it was after operation t (0 = initial).
+    engine_cls must be snapshottable (see snapshot_class).
+    """
+
+    def __init__(self, engine_cls, values, block_size=None, **kwargs):
+        engine_cls = snapshot_class(engine_cls)
+        self.engine = engine_cls(values, block_size, storage=VersionedBlockStorage, **kwargs)
+        self.store = self.engine.store
+        # versions[t] is the snapshot taken after operation t
+        self.versions = [self.store.snapshot()]
+
+    def run(self, opt, l, r, c):
+        """Replay columnar operations like engine.run, snapshotting after each"""
+        opt = np.asarray(opt)
+        l = np.asarray(l)
+        r = np.asarray(r)
+        c = np.asarray(c)
+        answers = []
+        run = self.engine.run
+        snapshot = self.store.snapshot
+        for i in range(len(l)):
+            answers.extend(run(opt[i:i + 1], l[i:i + 1], r[i:i + 1], c[i:i + 1]))
+            self.versions.append(snapshot())
+        return answers
+
+    @property
+    def operations(self):
+        """Number of operations applied so far"""
+        return len(self.versions) - 1
+
+    def at(self, t):
+        """Read-only engine after operation t; use its query methods"""
+        if not 0 <= t <= self.operations:
+            raise IndexError(f"operation {t} out of range 0..{self.operations}")
+        return historical_engine(self.engine, self.store.checkout(self.versions[t]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opt-in hot-path instrumentation for the block engines.
+Counts, per operation, whole-block work (整块), partial-block element touches
+(散块), tag pushdowns and block rebuilds, and keeps log2 histograms plus an
+optional per-operation trace. Engines only pay a None check when disabled.
+"""
+
+import argparse
+from array import array
+
+import numpy as np
+
+from block_autotune import ENGINES
+from block_common import load_input
+
+# Counter names, in trace column order after opt
+FIELDS = ('whole', 'touched', 'pushdowns', 'rebuilds')
+
+# Histogram buckets: bucket k holds counts with bit_length k (0, 1, 2-3, 4-7, ...)
+BUCKETS = 65
+
+class BlockStats:
+    """
+    Per-operation work counters. Engines increment the public counters while
+    an operation runs and call end_op() once it is done:
+
+    - whole: whole blocks handled through their tag or aggregate
+    - touched: elements read or written in partial blocks
+    - pushdowns: block tags written down into elements
+    - rebuilds: per-block structures recomputed (sorted copies, sum/max)
+    """
+
+    def __init__(self, trace=True):
+        self.whole = 0
+        self.touched = 0
+        self.pushdowns = 0
+        self.rebuilds = 0
+        self.ops = 0
+        self.totals = [0] * len(FIELDS)
+        self.histograms = [[0] * BUCKETS for _ in FIELDS]
+        # Flat (opt, whole, touched, pushdowns, rebuilds) rows
+        self.trace = array('q') if trace else None
+
+    def end_op(self, opt):
+        """Fold the current operation's counters into totals, histograms and trace"""
+        row = (self.whole, self.touched, self.pushdowns, self.rebuilds)
+        totals = self.totals
+        histograms = self.histograms
+        for i, v in enumerate(row):
+            totals[i] += v
+            histograms[i][v.bit_length()] += 1
+        if self.trace is not None:
+            self.trace.append(opt)
+            self.trace.extend(row)
+        self.ops += 1
+        self.whole = self.touched = self.pushdowns = self.rebuilds = 0
+
+    def trace_array(self):
+        """Per-operation trace as an (ops, 5) int64 array: opt, then FIELDS"""
+        if self.trace is None:
+            raise ValueError("trace recording is disabled")
+        return np.frombuffer(self.trace, dtype=np.int64).reshape(-1, 1 + len(FIELDS)).copy()
+
+    def over_budget(self, budget, field='touched'):
+        """Indices of operations whose counter exceeds budget (e.g. c·√n)"""
+        column = 1 + FIELDS.index(field)
+        return np.flatnonzero(self.trace_array()[:, column] > budget)
+
+    def summary(self):
+        """Totals, per-operation means and non-empty histogram buckets"""
+        result = {'ops': self.ops}
+        for i, name in enumerate(FIELDS):
+            hist = self.histograms[i]
+            result[name] = {
+                'total': self.totals[i],
+                'mean': self.totals[i] / self.ops if self.ops else 0.0,
+                'histogram': {_bucket_label(k): c for k, c in enumerate(hist) if c},
+            }
+        return result
+
+    def write_trace(self, path):
+        """Write the per-operation trace as CSV"""
+        rows = self.trace_array()
+        np.savetxt(path, rows, fmt='%d', delimiter=',', header=','.join(('opt',) + FIELDS),
+                   comments='')
+
+def _bucket_label(k):
+    """Human-readable value range of histogram bucket k"""
+    if k <= 1:
+        return str(k)
+    return f"{1 << (k - 1)}-{(1 << k) - 1}"
+
+def main():
+    """Run an input through its default engine with instrumentation and report"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('problem', type=int, choices=sorted(ENGINES))
+    parser.add_argument('input', nargs='?', default=None)
+    parser.add_argument('--block-size', type=int, default=None)
+    parser.add_argument('--trace', default=None, help='write the per-operation trace CSV here')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='list operations touching more than budget·√n elements')
+    args = parser.parse_args()
+
+    values, opt, l, r, c = load_input(args.input, args.problem)
+    stats = BlockStats(trace=args.trace is not None or args.budget is not None)
+    engine = ENGINES[args.problem](values, block_size=args.block_size, stats=stats)
+    engine.run(opt, l, r, c)
+
+    summary = stats.summary()
+    print(f"Operations: {summary['ops']}")
+    for name in FIELDS:
+        info = summary[name]
+        print(f"{name}: total {info['total']}, mean {info['mean']:.2f}")
+        for label, count in info['histogram'].items():
+            print(f"  {label:>15}: {count}")
+    if args.trace:
+        stats.write_trace(args.trace)
+        print(f"Trace written to: {args.trace}")
+    if args.budget is not None:
+        limit = args.budget * len(values) ** 0.5
+        worst = stats.over_budget(limit)
+        print(f"Operations touching more than {limit:.0f} elements: {len(worst)}")
+        for i in worst[:20].tolist():
+            print(f"  op {i + 1}: opt={opt[i]} l={l[i]} r={r[i]}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
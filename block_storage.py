@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact array-backed storage shared by the block engines (q1_engine.py -
+q4_engine.py). Element data lives in flat typed planes (values and sorted
+copies) and block metadata (tags, sums, maxima) in flat per-block
+arrays; data() hands out zero-copy views of one block.
+MappedBlockStorage keeps the element planes on disk for out-of-core runs.
+"""
+
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+def fit_dtype(lo, hi, candidates=(np.int32, np.int64)):
+    """Return the first dtype in candidates that holds every value in [lo, hi]"""
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    raise OverflowError(f"no dtype in {candidates} holds [{lo}, {hi}]")
+
+class BlockStorage:
+    """
+    Element planes of length n and metadata arrays of length nblocks for a
+    fixed block size. Engines read element data through data(b), write it through
+    writable(b) and report writes with mark_dirty(b), so paged or versioned
+    storages can be swapped in.
+    """
+
+    def __init__(self, n, block_size):
+        self.n = n
+        self.block_size = block_size
+        self.nblocks = (n + block_size - 1) // block_size
+        self.planes = {}
+        self.meta = {}
+
+    def _allocate(self, name, length, dtype):
+        """Allocate the buffer of plane `name` (override point for other backings)"""
+        return np.empty(length, dtype=dtype)
+
+    def add_plane(self, name, dtype, fill=None):
+        """Create an element plane of length n and return it"""
+        plane = self._allocate(name, self.n, dtype)
+        if fill is not None:
+            plane[:] = fill
+        self.planes[name] = plane
+        return plane
+
+    def add_meta(self, name, dtype, fill=0, width=None):
+        """Create a per-block metadata array (a row of width entries per block if given)"""
+        shape = self.nblocks if width is None else (self.nblocks, width)
+        arr = np.full(shape, fill, dtype=dtype)
+        self.meta[name] = arr
+        return arr
+
+    def retype(self, name, dtype):
+        """Convert a plane or metadata array to a wider dtype and return it"""
+        if name in self.meta:
+            self.meta[name] = self.meta[name].astype(dtype)
+            return self.meta[name]
+        self.flush()
+        old = self.planes[name]
+        plane = self._allocate(name, self.n, dtype)
+        plane[:] = old
+        self.planes[name] = plane
+        return plane
+
+    def plane(self, name='values'):
+        """The whole element plane, for vectorized full-array passes"""
+        return self.planes[name]
+
+    def bounds(self, b):
+        """(start, stop) element indices of block b"""
+        start = b * self.block_size
+        return start, min(start + self.block_size, self.n)
+
+    def sizes(self):
+        """Number of elements in every block"""
+        sizes = np.full(self.nblocks, self.block_size, dtype=np.int64)
+        if self.nblocks:
+            sizes[-1] = self.n - (self.nblocks - 1) * self.block_size
+        return sizes
+
+    def data(self, b, plane='values'):
+        """Writable view of block b's elements in a plane"""
+        start = b * self.block_size
+        return self.planes[plane][start:start + self.block_size]
+
+    def writable(self, b, plane='values'):
+        """View of block b's elements in a plane that the caller is about to modify"""
+        return self.data(b, plane)
+
+    def mark_dirty(self, b, plane='values'):
+        """Record that block b's elements in a plane were written"""
+
+    def flush(self):
+        """Make every written block visible through plane()"""
+
+    def close(self):
+        """Release the storage (nothing to do for in-memory planes)"""
+
+    def __len__(self):
+        return self.nblocks
+
+    def nbytes(self):
+        """Bytes held by planes and metadata (object metadata counted as pointers)"""
+        return (sum(p.nbytes for p in self.planes.values())
+                + sum(m.nbytes for m in self.meta.values()))
+
+class MappedBlockStorage(BlockStorage):
+    """
+    Out-of-core BlockStorage: element planes live in memory-mapped files and
+    block-aligned pages are loaded on demand into an LRU cache; dirty pages
+    are written back when evicted. Metadata stays in memory, so whole-block
+    tag operations never do I/O.
+
+    Pass it to an engine as storage=functools.partial(MappedBlockStorage, ...).
+    """
+
+    # An operation touches at most two partial blocks in up to two planes;
+    # its pages must stay cached until it has reported them with mark_dirty()
+    MIN_CACHE_BLOCKS = 8
+
+    def __init__(self, n, block_size, directory=None, cache_blocks=256):
+        super().__init__(n, block_size)
+        if directory is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix='block_storage_')
+            directory = self._tmp.name
+        else:
+            self._tmp = None
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.cache_blocks = max(cache_blocks, self.MIN_CACHE_BLOCKS)
+        # (plane, block) -> in-memory page, least recently used first
+        self.pages = OrderedDict()
+        self.dirty = set()
+        self.loads = 0
+        self.writebacks = 0
+        self._files = 0
+
+    def _allocate(self, name, length, dtype):
+        # A fresh file per allocation, so retype() can copy from the old one
+        self._files += 1
+        path = os.path.join(self.directory, f"{name}.{self._files}.bin")
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='w+', shape=(length,))
+
+    def data(self, b, plane='values'):
+        """Cached page of block b in a plane, loaded from the file on a miss"""
+        key = (plane, b)
+        pages = self.pages
+        page = pages.get(key)
+        if page is not None:
+            pages.move_to_end(key)
+            return page
+        start = b * self.block_size
+        page = np.array(self.planes[plane][start:start + self.block_size])
+        self.loads += 1
+        pages[key] = page
+        if len(pages) > self.cache_blocks:
+            self._evict()
+        return page
+
+    def writable(self, b, plane='values'):
+        page = self.data(b, plane)
+        self.dirty.add((plane, b))
+        return page
+
+    def mark_dirty(self, b, plane='values'):
+        """Schedule block b's cached page for write-back"""
+        self.dirty.add((plane, b))
+
+    def _write_back(self, key, page):
+        plane, b = key
+        start = b * self.block_size
+        self.planes[plane][start:start + len(page)] = page
+        self.dirty.discard(key)
+        self.writebacks += 1
+
+    def _evict(self):
+        """Drop the least recently used page, writing it back if dirty"""
+        key, page = self.pages.popitem(last=False)
+        if key in self.dirty:
+            self._write_back(key, page)
+
+    def flush(self):
+        """Write every dirty page back to its file (pages stay cached)"""
+        pages = self.pages
+        for key in sorted(self.dirty):
+            self._write_back(key, pages[key])
+
+    def plane(self, name='values'):
+        """The whole memory-mapped plane, with cached writes flushed to it"""
+        self.flush()
+        return self.planes[name]
+
+    def retype(self, name, dtype):
+        """Copy a plane into a new file of a wider dtype and remove the old file"""
+        if name not in self.planes:
+            return super().retype(name, dtype)
+        self.flush()
+        for key in [key for key in self.pages if key[0] == name]:
+            del self.pages[key]
+        old = self.planes[name]
+        plane = super().retype(name, dtype)
+        if isinstance(old, np.memmap):
+            plane.flush()
+            os.remove(old.filename)
+        return plane
+
+    def nbytes(self):
+        """Bytes held in memory: metadata and cached pages (files excluded)"""
+        return (sum(m.nbytes for m in self.meta.values())
+                + sum(p.nbytes for p in self.pages.values()))
+
+    def close(self):
+        """Flush dirty pages, drop the cache and remove temporary files"""
+        self.flush()
+        self.pages.clear()
+        for plane in self.planes.values():
+            if isinstance(plane, np.memmap):
+                plane.flush()
+        self.planes.clear()
+        if self._tmp is not None:
+            self._tmp.cleanup()
@@ -41,9 +41,10 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
-import re
 import os
 
+from math_translate import unicode_to_latex
+
 # Mathematical Unicode characters to detect
 MATH_UNICODE_CHARS = ['₀', '₁', '₂', '₃', '₄', '₅', '₆', '₇', '₈', '₉', 
                       'ₙ', 'ᵢ', 'ᵣ', '√', '⌊', '⌋', '≤', '≥', '≠', '←', '→', '⁹']
@@ -55,110 +56,10 @@ def convert_math_to_latex(text):
     """
     Convert Unicode mathematical notation to LaTeX-style notation.
     This function wraps mathematical expressions in $...$ and converts symbols.
+    The translation is math_translate.unicode_to_latex: one scan per distinct
+    paragraph instead of a cascade of substitutions.
     """
-    # Don't modify empty text
-    if not text or not text.strip():
-        return text
-    
-    result = text
-    
-    # Step 1: Convert Unicode math symbols to LaTeX commands (without wrapping in $)
-    # Subscripts - convert to LaTeX
-    result = re.sub(r'([a-zA-Z])₀', r'\1_0', result)
-    result = re.sub(r'([a-zA-Z])₁', r'\1_1', result)
-    result = re.sub(r'([a-zA-Z])₂', r'\1_2', result)
-    result = re.sub(r'([a-zA-Z])₃', r'\1_3', result)
-    result = re.sub(r'([a-zA-Z])₄', r'\1_4', result)
-    result = re.sub(r'([a-zA-Z])₅', r'\1_5', result)
-    result = re.sub(r'([a-zA-Z])₆', r'\1_6', result)
-    result = re.sub(r'([a-zA-Z])₇', r'\1_7', result)
-    result = re.sub(r'([a-zA-Z])₈', r'\1_8', result)
-    result = re.sub(r'([a-zA-Z])₉', r'\1_9', result)
-    result = re.sub(r'([a-zA-Z])ₙ', r'\1_n', result)
-    result = re.sub(r'([a-zA-Z])ᵢ', r'\1_i', result)
-    result = re.sub(r'([a-zA-Z])ᵣ', r'\1_r', result)
-    
-    # Superscripts
-    result = re.sub(r'([0-9]+)⁹', r'\1^9', result)
-    
-    # Square root - replace with LaTeX
-    result = re.sub(r'√([a-zA-Z0-9_]+)', r'\\sqrt{\1}', result)
-    result = re.sub(r'√', r'\\sqrt{n}', result)
-    
-    # Floor brackets
-    result = re.sub(r'⌊', r'\\lfloor ', result)
-    result = re.sub(r'⌋', r' \\rfloor', result)
-    
-    # Comparison operators
-    result = re.sub(r'≤', r' \\leq ', result)
-    result = re.sub(r'≥', r' \\geq ', result)
-    result = re.sub(r'≠', r' \\neq ', result)
-    
-    # Arrows
-    result = re.sub(r'←', r' \\leftarrow ', result)
-    result = re.sub(r'→', r' \\rightarrow ', result)
-    
-    # Step 2: Protect complex expressions by replacing them with placeholders
-    # This prevents nested wrapping
-    
-    # Protect O() expressions
-    o_expressions = []
-    def save_o_expr(match):
-        o_expressions.append(match.group(1))
-        return f'@@OBIG{len(o_expressions)-1}@@'
-    result = re.sub(r'O\(([^)]+)\)', save_o_expr, result)
-    
-    # Protect floor expressions
-    floor_expressions = []
-    def save_floor_expr(match):
-        floor_expressions.append(match.group(1))
-        return f'@@FLOOR{len(floor_expressions)-1}@@'
-    result = re.sub(r'\\lfloor\s+([^\\]+?)\s+\\rfloor', save_floor_expr, result)
-    
-    # Step 3: Now wrap mathematical expressions in $ ... $ (won't affect protected contents)
-    
-    # Wrap sqrt expressions
-    result = re.sub(r'\\sqrt\{([a-zA-Z0-9_]+)\}', r'$\\sqrt{\1}$', result)
-    
-    # Wrap variables with subscripts (e.g., a_1, a_i, a_n)
-    result = re.sub(r'\b([a-zA-Z])_\{([a-zA-Z0-9]+)\}', r'$\1_{\2}$', result)
-    result = re.sub(r'\b([a-zA-Z])_([a-zA-Z0-9]+)\b', r'$\1_{\2}$', result)
-    
-    # Wrap superscripts  
-    result = re.sub(r'\b([0-9]+)\^([0-9]+)\b', r'$\1^{\2}$', result)
-    
-    # Wrap comparison operators (with surrounding context)
-    result = re.sub(r'(\s)\\(leq|geq|neq)(\s)', r'$\\\2$', result)
-    
-    # Wrap arrows (with surrounding context)
-    result = re.sub(r'(\s)\\(leftarrow|rightarrow)(\s)', r'$\\\2$', result)
-    
-    # Step 4: Restore protected expressions with wrapping
-    for i, expr in enumerate(o_expressions):
-        result = result.replace(f'@@OBIG{i}@@', f'$O({expr})$')
-    
-    for i, expr in enumerate(floor_expressions):
-        result = result.replace(f'@@FLOOR{i}@@', f'$\\lfloor {expr} \\rfloor$')
-    
-    # Step 5: Clean up - merge adjacent math mode markers
-    # Remove empty math mode
-    result = re.sub(r'\$\s*\$', ' ', result)
-    # Merge consecutive math expressions (run multiple times for complex cases)
-    # We iterate up to 20 times to handle deeply nested expressions
-    MAX_MERGE_ITERATIONS = 20
-    for _ in range(MAX_MERGE_ITERATIONS):
-        old_result = result
-        result = re.sub(r'\$([^$\n]*?)\$\s*\$([^$\n]*?)\$', r'$\1 \2$', result)
-        if old_result == result:
-            break
-    
-    # Add space after commas before $
-    result = re.sub(r',\$', ', $', result)
-    
-    # Clean up extra spaces
-    result = re.sub(r'\s+', ' ', result)
-    
-    return result
+    return unicode_to_latex(text)
 
 def process_presentation(input_file, output_file):
     """
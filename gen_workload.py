@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seeded, streaming workload generator for the Q1-Q4 input formats.
+Values and operations are generated and written in fixed-size chunks, so
+memory stays constant even for 10^8-line files. Besides uniform random
+operations there are adversarial modes aimed at each solution's weak point.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from block_common import default_block_size
+
+# Lines generated and written per chunk
+CHUNK = 1 << 16
+
+# Problems whose input has its own operation count q; Q1-Q3 always have n
+HAS_Q = (4,)
+
+# Generation modes and the problems they apply to
+MODES = {
+    'uniform': (1, 2, 3, 4),
+    'partial': (1, 4),      # update endpoints inside blocks: pushdown / rebuild every time
+    'untagged': (2,),       # break every block tag, then count over the whole array
+    'near-max': (3,),       # values close to 2^63
+}
+
+def _value_domain(n):
+    """Value range of Example 2, small enough that counts are non-trivial"""
+    return max(2, int(n ** 0.5))
+
+def iter_values(problem, n, mode, rng, chunk=CHUNK):
+    """Yield the n initial values in chunks"""
+    for start in range(0, n, chunk):
+        k = min(chunk, n - start)
+        if problem == 1:
+            yield rng.integers(0, 10 ** 9, k)
+        elif problem == 2:
+            yield rng.integers(0, _value_domain(n), k)
+        elif problem == 3:
+            if mode == 'near-max':
+                yield np.uint64(2 ** 63) - rng.integers(0, 2 ** 32, k, dtype=np.uint64)
+            else:
+                yield rng.integers(0, 2 ** 62, k, dtype=np.uint64)
+        else:
+            yield rng.integers(0, 1001, k)
+
+def _inside_block(rng, n, block_size, k):
+    """1-based positions strictly inside a block (never on a block boundary)"""
+    if block_size < 3:
+        return rng.integers(1, n + 1, k)
+    nblocks = max(1, (n - 2) // block_size)
+    pos = rng.integers(0, nblocks, k) * block_size + rng.integers(1, block_size - 1, k)
+    return np.minimum(pos, n - 1) + 1
+
+def iter_ops(problem, n, q, mode, rng, query=0.5, span=1.0, block_size=None, chunk=CHUNK):
+    """
+    Yield q operations as (opt, l, r, c) column chunks. query is the share of
+    queries, span the maximum range length as a share of n; adversarial modes
+    place endpoints relative to blocks of block_size (default √n).
+    """
+    if mode not in MODES or problem not in MODES[mode]:
+        raise ValueError(f"mode {mode!r} does not apply to Q{problem}")
+    B = block_size or default_block_size(n)
+    nblocks = (n + B - 1) // B
+    width = max(1, int(n * span))
+    for start in range(0, q, chunk):
+        k = min(chunk, q - start)
+        l = rng.integers(1, n + 1, k)
+        r = np.minimum(n, l + rng.integers(0, width, k))
+        is_query = rng.random(k) < query
+
+        if mode == 'partial':
+            a = _inside_block(rng, n, B, k)
+            b = _inside_block(rng, n, B, k)
+            upd = ~is_query
+            l = np.where(upd, np.minimum(a, b), l)
+            r = np.where(upd, np.maximum(a, b), r)
+        elif mode == 'untagged':
+            # Cycle: one single-element write inside each block (pushes its
+            # tag down), then one operation over the whole array
+            t = np.arange(start, start + k) % (nblocks + 1)
+            whole = t == nblocks
+            pos = np.minimum(t * B + rng.integers(0, B, k), n - 1) + 1
+            l = np.where(whole, 1, pos)
+            r = np.where(whole, n, pos)
+
+        if problem == 1:
+            opt = np.where(is_query, 2, rng.integers(0, 2, k))
+            c = rng.integers(0, 10 ** 4, k)
+        elif problem == 2:
+            opt = np.zeros(k, dtype=np.int64)
+            c = rng.integers(0, _value_domain(n), k)
+        elif problem == 3:
+            opt = is_query.astype(np.int64)
+            c = np.zeros(k, dtype=np.int64)
+        else:
+            opt = is_query.astype(np.int64)
+            c = np.where(is_query, rng.integers(0, 2000, k), rng.integers(1, 100, k))
+        yield opt, l, r, c
+
+def make_workload(problem, n, q=None, mode='uniform', seed=0, **kwargs):
+    """Generate a whole workload in memory: (values, (opt, l, r, c))"""
+    rng = np.random.default_rng(seed)
+    q = n if q is None else q
+    values = np.concatenate(list(iter_values(problem, n, mode, rng)))
+    chunks = list(iter_ops(problem, n, q, mode, rng, **kwargs))
+    ops = tuple(np.concatenate(col) for col in zip(*chunks))
+    return values, ops
+
+def _format_ops(problem, opt, l, r, c):
+    """Render one chunk of operation lines"""
+    if problem == 2:
+        rows = zip(l.tolist(), r.tolist(), c.tolist())
+        return ''.join(f"{a} {b} {x}\n" for a, b, x in rows)
+    if problem == 3:
+        rows = zip(opt.tolist(), l.tolist(), r.tolist())
+        return ''.join(f"{o} {a} {b}\n" for o, a, b in rows)
+    rows = zip(opt.tolist(), l.tolist(), r.tolist(), c.tolist())
+    if problem == 4:
+        return ''.join(f"{'MA'[o]} {a} {b} {x}\n" for o, a, b, x in rows)
+    return ''.join(f"{o} {a} {b} {x}\n" for o, a, b, x in rows)
+
+def write_workload(out, problem, n, q=None, mode='uniform', seed=0, **kwargs):
+    """
+    Stream a workload in the exact Q1-Q4 input format to a text file object.
+    Q1-Q3 inputs have exactly n operations, so q must be n (or None) there.
+    """
+    q = n if q is None else q
+    if problem not in HAS_Q and q != n:
+        raise ValueError(f"Q{problem} inputs have exactly n = {n} operations, not {q}")
+    rng = np.random.default_rng(seed)
+    out.write(f"{n} {q}\n" if problem in HAS_Q else f"{n}\n")
+    first = True
+    for chunk in iter_values(problem, n, mode, rng):
+        if not first:
+            out.write(' ')
+        out.write(' '.join(map(str, chunk.tolist())))
+        first = False
+    out.write('\n')
+    for opt, l, r, c in iter_ops(problem, n, q, mode, rng, **kwargs):
+        out.write(_format_ops(problem, opt, l, r, c))
+
+def main():
+    """Write a generated workload to a file or stdout"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('problem', type=int, choices=[1, 2, 3, 4])
+    parser.add_argument('n', type=int)
+    parser.add_argument('-q', '--ops', type=int, default=None,
+                        help='number of operations (Q4 only; Q1-Q3 always have n)')
+    parser.add_argument('--mode', default='uniform', choices=sorted(MODES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--query', type=float, default=0.5, help='share of query operations')
+    parser.add_argument('--span', type=float, default=1.0,
+                        help='maximum range length as a share of n')
+    parser.add_argument('--block-size', type=int, default=None,
+                        help='block size targeted by adversarial modes (default: √n)')
+    parser.add_argument('-o', '--output', default='-')
+    args = parser.parse_args()
+
+    if args.problem not in MODES[args.mode]:
+        parser.error(f"mode {args.mode!r} does not apply to Q{args.problem}")
+    if args.ops is not None and args.problem not in HAS_Q and args.ops != args.n:
+        parser.error(f"Q{args.problem} inputs have exactly n = {args.n} operations")
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', buffering=1 << 20)
+    try:
+        write_workload(out, args.problem, args.n, args.ops, args.mode, args.seed,
+                       query=args.query, span=args.span, block_size=args.block_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
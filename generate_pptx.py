@@ -2,472 +2,221 @@
 # -*- coding: utf-8 -*-
 """
 Generate block_lecture.pptx from the LaTeX content.
-This script converts the LaTeX lecture notes into a PowerPoint presentation.
+block_lecture.tex is the single source: tex_slides.py turns it into a
+declarative spec (sections of slides, each slide a title plus paragraphs
+[text, level, size] with an optional fourth element true for bold). A spec
+saved as JSON can be built as well. The compiler below writes every slide's
+shape tree as one XML string instead of setting python-pptx paragraph
+properties one by one.
 """
 
 from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
+from pptx.util import Inches
+from pptx.oxml import parse_xml
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from xml.sax.saxutils import escape
+import argparse
+import copy
+import hashlib
+import inspect
+import json
 import os
 
-def create_title_slide(prs):
-    """Create the title slide"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
-    
-    # Add title
-    title_box = slide.shapes.add_textbox(Inches(1), Inches(3), Inches(8), Inches(2))
-    title_frame = title_box.text_frame
-    title_frame.text = "分块算法经典例题讲解"
-    title_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-    title_frame.paragraphs[0].font.size = Pt(44)
-    title_frame.paragraphs[0].font.bold = True
-    title_frame.paragraphs[0].font.color.rgb = RGBColor(0, 0, 0)
+from tex_slides import spec_slides, tex_to_spec
 
-def add_section_title(slide, title):
-    """Add a section title to a slide"""
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(1))
-    title_frame = title_box.text_frame
-    title_frame.text = title
-    title_frame.paragraphs[0].font.size = Pt(32)
-    title_frame.paragraphs[0].font.bold = True
-    title_frame.paragraphs[0].font.color.rgb = RGBColor(0, 0, 139)  # Dark blue
+# Bump when the cache format or the copy procedure changes
+CACHE_VERSION = 2
 
-def add_bullet_text(text_frame, text, level=0, font_size=18):
-    """Add a bullet point with specified level"""
-    p = text_frame.add_paragraph()
-    p.text = text
-    p.level = level
-    p.font.size = Pt(font_size)
+SLIDE_WIDTH = Inches(10)
+SLIDE_HEIGHT = Inches(7.5)
 
-def create_example1_slides(prs):
-    """Create slides for Example 1: 区间乘法、区间加法与单点查询"""
-    
-    # Slide 1: Problem statement
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题1：区间乘法、区间加法与单点查询")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "题目描述"
-    p.font.size = Pt(24)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "给出一个长度为 n 的数列 a₁, a₂, …, aₙ，以及 n 个操作", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作类型：", 0, 20)
-    add_bullet_text(text_frame, "操作0（区间加法）：opt = 0, l, r, c", 1, 16)
-    add_bullet_text(text_frame, "将区间 [l, r] 中的所有数字都加上 c", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作1（区间乘法）：opt = 1, l, r, c", 1, 16)
-    add_bullet_text(text_frame, "将区间 [l, r] 中的所有数字都乘以 c", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作2（单点查询）：opt = 2, r", 1, 16)
-    add_bullet_text(text_frame, "查询 aᵣ 的当前值", 2, 14)
-    
-    # Slide 2: Solution
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题1：解法 - 分块 + 懒标记")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "核心思想"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "将长度为 n 的数列分成 √n 个块，每块大小约为 √n", 0, 16)
-    add_bullet_text(text_frame, "对每个块维护两个懒标记：", 0, 16)
-    add_bullet_text(text_frame, "mul[i]：第 i 块的乘法标记（初始为1）", 1, 15)
-    add_bullet_text(text_frame, "add[i]：第 i 块的加法标记（初始为0）", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作实现：", 0, 20)
-    add_bullet_text(text_frame, "区间加法/乘法：", 1, 16)
-    add_bullet_text(text_frame, "对于完整覆盖的块：只更新懒标记", 2, 14)
-    add_bullet_text(text_frame, "对于部分覆盖的块：暴力修改每个元素", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "单点查询：", 1, 16)
-    add_bullet_text(text_frame, "查询 aᵣ 时，返回 aᵣ × mul[block(r)] + add[block(r)]", 2, 14)
-    
-    # Slide 3: Complexity
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题1：复杂度分析")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "空间复杂度"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "原数组：O(n)", 0, 16)
-    add_bullet_text(text_frame, "块标记：O(√n) 个块，每块2个标记", 0, 16)
-    add_bullet_text(text_frame, "总空间：O(n)", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    p = text_frame.add_paragraph()
-    p.text = "时间复杂度"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "区间修改操作（加法或乘法）：", 0, 16)
-    add_bullet_text(text_frame, "散块（两端不完整的块）：暴力修改，O(√n)", 1, 15)
-    add_bullet_text(text_frame, "完整块：只修改标记，最多 O(√n) 个块，每个 O(1)", 1, 15)
-    add_bullet_text(text_frame, "单次操作：O(√n)", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "单点查询操作：直接通过下标计算所属块号，应用标记，O(1)", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "总复杂度：O(n√n)", 0, 20)
+# Text boxes: (left, top, width, height) in inches
+TITLE_SLIDE_BOX = (1, 3, 8, 2)
+SECTION_TITLE_BOX = (0.5, 0.5, 9, 1)
+CONTENT_BOX = (0.7, 1.5, 8.6, 5)
 
-def create_example2_slides(prs):
-    """Create slides for Example 2: 区间查询与区间赋值"""
-    
-    # Slide 1: Problem statement
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题2：区间查询与区间赋值")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "题目描述"
-    p.font.size = Pt(24)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "给出一个长度为 n 的数列 a₁, a₂, …, aₙ，以及 n 个操作", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作内容（每个操作包含两步）：", 0, 20)
-    add_bullet_text(text_frame, "每个操作由三个参数 l, r, c 组成：", 0, 16)
-    add_bullet_text(text_frame, "1. 查询：统计区间 [l, r] 中有多少个元素等于 c", 1, 16)
-    add_bullet_text(text_frame, "2. 修改：将区间 [l, r] 中的所有元素都赋值为 c", 1, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "示例：", 0, 20)
-    add_bullet_text(text_frame, "初始数组：[1, 2, 2, 3, 3]", 0, 16)
-    add_bullet_text(text_frame, "操作 l=2, r=4, c=2：", 0, 16)
-    add_bullet_text(text_frame, "查询结果：区间 [2,4] 是 [2, 2, 3]，有2个元素等于2", 1, 14)
-    add_bullet_text(text_frame, "修改后：[1, 2, 2, 2, 3]", 1, 14)
-    
-    # Slide 2: Solution
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题2：解法 - 分块 + 区间赋值标记")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "核心思想"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "将数组分成 √n 个块，每块维护：", 0, 16)
-    add_bullet_text(text_frame, "tag[i]：整块赋值标记（-1表示无标记）", 1, 15)
-    add_bullet_text(text_frame, "每个元素的实际值", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作实现：", 0, 20)
-    add_bullet_text(text_frame, "散块（两端不完整块）：", 1, 16)
-    add_bullet_text(text_frame, "先下传该块的标记（如果有）", 2, 14)
-    add_bullet_text(text_frame, "遍历散块元素，统计等于 c 的个数", 2, 14)
-    add_bullet_text(text_frame, "将散块元素逐个赋值为 c", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "整块（完全覆盖的块）：", 1, 16)
-    add_bullet_text(text_frame, "如果该块有标记 tag[i]：", 2, 14)
-    add_bullet_text(text_frame, "若 tag[i] = c，贡献块大小个 c", 3, 13)
-    add_bullet_text(text_frame, "否则贡献0个 c", 3, 13)
-    add_bullet_text(text_frame, "否则遍历块内所有元素统计", 2, 14)
-    add_bullet_text(text_frame, "给整块打上标记 tag[i] = c", 2, 14)
-    
-    # Slide 3: Complexity
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题2：复杂度分析")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "单次操作时间复杂度"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "散块处理：O(B)", 0, 16)
-    add_bullet_text(text_frame, "整块标记：O(n/B)", 0, 16)
-    add_bullet_text(text_frame, "整块查询（最坏）：O(B × n/B) = O(n)", 0, 16)
-    add_bullet_text(text_frame, "单次总复杂度：O(n)", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    p = text_frame.add_paragraph()
-    p.text = "均摊分析"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "关键观察：整块查询只在块没有标记时遍历", 0, 16)
-    add_bullet_text(text_frame, "一旦打上标记后，之后的查询都是 O(1)", 0, 16)
-    add_bullet_text(text_frame, "每个元素最多被遍历常数次（打标记前）", 0, 16)
-    add_bullet_text(text_frame, "散块操作：O(√n)", 0, 16)
-    add_bullet_text(text_frame, "整块标记：O(√n)", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "选择 B = √n，单次操作均摊：O(√n)", 0, 16)
-    add_bullet_text(text_frame, "总时间复杂度（均摊）：O(n√n)", 0, 20)
+# Title styles: (size, RGB hex)
+TITLE_SLIDE_STYLE = (44, '000000')
+SECTION_TITLE_STYLE = (32, '00008B')  # Dark blue
 
-def create_example3_slides(prs):
-    """Create slides for Example 3: 区间开方与区间求和"""
-    
-    # Slide 1: Problem statement
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题3：区间开方与区间求和")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "题目描述"
-    p.font.size = Pt(24)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "给出一个长度为 n 的数列 a₁, a₂, …, aₙ，以及 n 个操作", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作类型：", 0, 20)
-    add_bullet_text(text_frame, "操作0（区间开方）：opt = 0, l, r", 1, 16)
-    add_bullet_text(text_frame, "对区间 [l, r] 中的每个元素 aᵢ 进行开方", 2, 14)
-    add_bullet_text(text_frame, "aᵢ ← ⌊√aᵢ⌋", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作1（区间求和）：opt = 1, l, r", 1, 16)
-    add_bullet_text(text_frame, "查询区间 [l, r] 中所有元素的和", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "示例：", 0, 20)
-    add_bullet_text(text_frame, "初始：[16, 9, 4, 1]", 0, 16)
-    add_bullet_text(text_frame, "操作0，l=1, r=3：[4, 3, 2, 1]", 0, 16)
-    add_bullet_text(text_frame, "操作1，l=1, r=4：输出 4+3+2+1=10", 0, 16)
-    
-    # Slide 2: Solution
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题3：解法 - 分块 + 区间和维护")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "核心思想"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "关键性质：开方操作使数字快速减小", 0, 16)
-    add_bullet_text(text_frame, "例：10⁹ → 31622 → 177 → 13 → 3 → 1", 1, 14)
-    add_bullet_text(text_frame, "约 log log n 次后变为1", 1, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "将数组分成 √n 个块，每块维护：", 0, 16)
-    add_bullet_text(text_frame, "sum[i]：第 i 块的元素和", 1, 15)
-    add_bullet_text(text_frame, "max[i]：第 i 块的最大值", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作实现：", 0, 20)
-    add_bullet_text(text_frame, "区间开方：", 1, 16)
-    add_bullet_text(text_frame, "对于整块：如果 max[i] ≤ 1，跳过（已收敛）", 2, 14)
-    add_bullet_text(text_frame, "否则遍历块内元素，逐个开方，更新 sum[i] 和 max[i]", 2, 14)
-    add_bullet_text(text_frame, "散块：直接暴力修改", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "区间求和：", 1, 16)
-    add_bullet_text(text_frame, "整块：直接累加 sum[i]，O(1)", 2, 14)
-    add_bullet_text(text_frame, "散块：遍历累加，O(√n)", 2, 14)
-    
-    # Slide 3: Complexity
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题3：复杂度分析")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "空间复杂度"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "原数组：O(n)", 0, 16)
-    add_bullet_text(text_frame, "块信息：O(√n) 个块，每块存储和与最大值", 0, 16)
-    add_bullet_text(text_frame, "总空间：O(n)", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    p = text_frame.add_paragraph()
-    p.text = "时间复杂度 - 关键分析"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "开方操作的收敛性：", 0, 16)
-    add_bullet_text(text_frame, "每个元素最多被开方 O(log log V) 次（V为最大值）", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "区间求和：", 0, 16)
-    add_bullet_text(text_frame, "整块：O(√n) 个块，每块 O(1)", 1, 15)
-    add_bullet_text(text_frame, "散块：O(√n)", 1, 15)
-    add_bullet_text(text_frame, "单次：O(√n)", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "区间开方（均摊）：", 0, 16)
-    add_bullet_text(text_frame, "单次操作：最坏 O(n)，均摊 O(√n log log V)", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "总时间复杂度：O(n√n log log V)", 0, 20)
+DEFAULT_SIZE = 18
 
-def create_example4_slides(prs):
-    """Create slides for Example 4: 区间生长与区间计数"""
-    
-    # Slide 1: Problem statement
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题4：区间生长与区间计数")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "题目描述"
-    p.font.size = Pt(24)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "有 n 株花，每株花有一个初始高度（≤ 1000 的自然数）", 0, 16)
-    add_bullet_text(text_frame, "有两个角色执行 q 个操作：", 0, 16)
-    add_bullet_text(text_frame, "Lily White：使花儿生长", 1, 15)
-    add_bullet_text(text_frame, "Yuka：统计满足条件的花", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作类型：", 0, 20)
-    add_bullet_text(text_frame, "操作M（生长）：M l r h", 1, 16)
-    add_bullet_text(text_frame, "使区间 [l, r] 内所有花的高度增加 h", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作A（询问）：A l r k", 1, 16)
-    add_bullet_text(text_frame, "查询区间 [l, r] 内有多少花的高度不低于 k", 2, 14)
-    add_bullet_text(text_frame, "（统计满足 aᵢ ≥ k 的花的数量）", 2, 14)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "示例：", 0, 20)
-    add_bullet_text(text_frame, "初始：[5, 3, 8, 2]", 0, 16)
-    add_bullet_text(text_frame, "M 1 3 2：[7, 5, 10, 2]", 0, 16)
-    add_bullet_text(text_frame, "A 1 4 6：输出2（a₁=7 ≥ 6，a₃=10 ≥ 6）", 0, 16)
-    
-    # Slide 2: Solution
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题4：解法 - 分块 + 懒标记 + 块内排序")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "核心思想"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "将数组分成 √n 个块，每块维护：", 0, 16)
-    add_bullet_text(text_frame, "add[i]：第 i 块的加法懒标记", 1, 15)
-    add_bullet_text(text_frame, "sorted[i]：第 i 块元素的有序副本", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "操作实现：", 0, 20)
-    add_bullet_text(text_frame, "区间加法（M操作）：", 1, 16)
-    add_bullet_text(text_frame, "整块：直接增加 add[i] 标记，O(1)", 2, 14)
-    add_bullet_text(text_frame, "散块：", 2, 14)
-    add_bullet_text(text_frame, "下传标记到块内所有元素", 3, 13)
-    add_bullet_text(text_frame, "逐个修改散块元素", 3, 13)
-    add_bullet_text(text_frame, "重新排序该块的有序副本，O(√n log √n)", 3, 13)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "区间计数（A操作）：", 1, 16)
-    add_bullet_text(text_frame, "整块：在有序副本中二分查找", 2, 14)
-    add_bullet_text(text_frame, "查找第一个 ≥ k - add[i] 的位置", 3, 13)
-    add_bullet_text(text_frame, "该位置右侧的元素都满足条件，O(log √n)", 3, 13)
-    add_bullet_text(text_frame, "散块：遍历元素，逐个判断，O(√n)", 2, 14)
-    
-    # Slide 3: Complexity
+SLIDE_XML = (
+    '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+    ' xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+    ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/>'
+    '</p:nvGrpSpPr><p:grpSpPr/>{shapes}</p:spTree></p:cSld>'
+    '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+)
+
+TEXTBOX_XML = (
+    '<p:sp><p:nvSpPr><p:cNvPr id="{id}" name="TextBox {number}"/><p:cNvSpPr txBox="1"/>'
+    '<p:nvPr/></p:nvSpPr><p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/>'
+    '</a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="{wrap}"><a:spAutoFit/></a:bodyPr><a:lstStyle/>{paragraphs}'
+    '</p:txBody></p:sp>'
+)
+
+def paragraph_xml(text, level=0, size=DEFAULT_SIZE, bold=False, color=None, align=None):
+    """One <a:p> element: paragraph-level font size, bold and color, then the text"""
+    attrs = f' lvl="{level}"' if level else ''
+    if align:
+        attrs += f' algn="{align}"'
+    font = f'sz="{size * 100}"' + (' b="1"' if bold else '')
+    if color:
+        font = f'<a:defRPr {font}><a:solidFill><a:srgbClr val="{color}"/></a:solidFill></a:defRPr>'
+    else:
+        font = f'<a:defRPr {font}/>'
+    runs = '<a:br/>'.join(f'<a:r><a:t>{escape(line)}</a:t></a:r>' if line else ''
+                          for line in text.split('\n'))
+    return f'<a:p><a:pPr{attrs}>{font}</a:pPr>{runs}</a:p>'
+
+def textbox_xml(number, box, paragraphs, wrap=False):
+    """One text box shape holding already compiled paragraphs"""
+    x, y, cx, cy = (int(Inches(v)) for v in box)
+    return TEXTBOX_XML.format(id=number + 1, number=number, x=x, y=y, cx=cx, cy=cy,
+                              wrap='square' if wrap else 'none', paragraphs=paragraphs)
+
+def compile_slide(spec):
+    """The <p:sld> XML of one slide spec"""
+    if spec.get('layout') == 'title':
+        size, color = TITLE_SLIDE_STYLE
+        title = paragraph_xml(spec['title'], size=size, bold=True, color=color, align='ctr')
+        return SLIDE_XML.format(shapes=textbox_xml(1, TITLE_SLIDE_BOX, title))
+    size, color = SECTION_TITLE_STYLE
+    shapes = [textbox_xml(1, SECTION_TITLE_BOX,
+                          paragraph_xml(spec['title'], size=size, bold=True, color=color))]
+    paragraphs = spec.get('paragraphs')
+    if paragraphs:
+        try:
+            body = ''.join([paragraph_xml(*p) for p in paragraphs])
+        except TypeError:
+            raise ValueError(f"bad paragraph in slide {spec['title']!r}: "
+                             "expected [text, level, size] or [text, level, size, bold]")
+        shapes.append(textbox_xml(2, CONTENT_BOX, body, wrap=True))
+    return SLIDE_XML.format(shapes=''.join(shapes))
+
+def load_spec(path):
+    """Read a slide spec (.json) or a lecture (.tex) and return its slides in deck order"""
+    with open(path, encoding='utf-8') as f:
+        spec = tex_to_spec(f.read()) if path.endswith('.tex') else json.load(f)
+    return spec_slides(spec)
+
+# Functions whose output every slide depends on
+COMPILER = (paragraph_xml, textbox_xml, compile_slide)
+
+def compiler_hash():
+    """Hash of the compiler: its source, the layout constants and the cache version"""
+    digest = hashlib.sha256(f"{CACHE_VERSION} {SLIDE_WIDTH} {SLIDE_HEIGHT} {TITLE_SLIDE_BOX} "
+                            f"{SECTION_TITLE_BOX} {CONTENT_BOX} {TITLE_SLIDE_STYLE} "
+                            f"{SECTION_TITLE_STYLE} {DEFAULT_SIZE}\n".encode())
+    digest.update(SLIDE_XML.encode())
+    digest.update(TEXTBOX_XML.encode())
+    for func in COMPILER:
+        digest.update(inspect.getsource(func).encode())
+    return digest.hexdigest()
+
+def slide_hash(spec, base):
+    """Content hash of one slide: its spec plus the compiler hash"""
+    text = json.dumps(spec, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{base}\n{text}".encode()).hexdigest()
+
+def file_hash(path):
+    """SHA-256 of a file's bytes"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def cache_path(output_file):
+    """Build manifest stored next to the deck"""
+    folder, name = os.path.split(output_file)
+    return os.path.join(folder, f".{name}.cache.json")
+
+def load_cache(output_file):
+    """
+    Return the previous deck and its slide hashes, or (None, []) when either
+    is missing or the deck was changed after the manifest was written
+    """
+    try:
+        with open(cache_path(output_file), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != CACHE_VERSION or manifest.get('deck') != file_hash(output_file):
+            return None, []
+    except (OSError, ValueError):
+        return None, []
+    return Presentation(output_file), manifest['slides']
+
+def copyable(slide):
+    """Whether a slide's XML is self-contained (no relationship besides its layout)"""
+    return all(rel.reltype == RT.SLIDE_LAYOUT for rel in slide.part.rels.values())
+
+def add_slide_xml(prs, source):
+    """Append a blank-layout slide whose content is the given <p:sld> element"""
     slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_section_title(slide, "例题4：复杂度分析")
-    
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.5), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
-    
-    p = text_frame.paragraphs[0]
-    p.text = "空间复杂度"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "原数组：O(n)", 0, 16)
-    add_bullet_text(text_frame, "有序副本：每块 O(√n)，共 O(√n) 个块，总计 O(n)", 0, 16)
-    add_bullet_text(text_frame, "懒标记：O(√n)", 0, 16)
-    add_bullet_text(text_frame, "总空间：O(n)", 0, 16)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    p = text_frame.add_paragraph()
-    p.text = "时间复杂度"
-    p.font.size = Pt(22)
-    p.font.bold = True
-    
-    add_bullet_text(text_frame, "M操作（区间加法）：", 0, 16)
-    add_bullet_text(text_frame, "整块标记：O(√n)", 1, 15)
-    add_bullet_text(text_frame, "散块修改+重排：O(√n log √n)", 1, 15)
-    add_bullet_text(text_frame, "单次：O(√n log √n)", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "A操作（区间计数）：", 0, 16)
-    add_bullet_text(text_frame, "整块二分：O(√n log √n)", 1, 15)
-    add_bullet_text(text_frame, "散块遍历：O(√n)", 1, 15)
-    add_bullet_text(text_frame, "单次：O(√n log √n)", 1, 15)
-    add_bullet_text(text_frame, "", 0, 12)
-    
-    add_bullet_text(text_frame, "q 个操作，每次 O(√n log √n)", 0, 16)
-    add_bullet_text(text_frame, "总时间复杂度：O(q√n log n)", 0, 20)
+    element = slide._element
+    for child in list(element):
+        element.remove(child)
+    for name, value in source.attrib.items():
+        element.set(name, value)
+    for child in list(source):
+        element.append(child)
+    return slide
+
+def build_deck(slides, output_file, force=False):
+    """
+    Build the deck from slide specs, copying every slide whose hash matches
+    a slide of the previous build from the existing file and compiling the
+    others. Returns the numbers of (compiled, copied) slides.
+    """
+    prs = Presentation()
+    prs.slide_width = SLIDE_WIDTH
+    prs.slide_height = SLIDE_HEIGHT
+
+    previous, cached = (None, []) if force else load_cache(output_file)
+    old_slides = list(previous.slides) if previous is not None else []
+    # Content-addressed: an unchanged slide is reused even if it moved
+    reusable = {}
+    for digest, slide in zip(cached, old_slides):
+        if copyable(slide):
+            reusable.setdefault(digest, slide)
+    base = compiler_hash()
+    hashes = []
+    compiled = copied = 0
+    for spec in slides:
+        digest = slide_hash(spec, base)
+        old = reusable.get(digest)
+        if old is not None:
+            add_slide_xml(prs, copy.deepcopy(old._element))
+            copied += 1
+        else:
+            add_slide_xml(prs, parse_xml(compile_slide(spec)))
+            compiled += 1
+        hashes.append(digest)
+
+    prs.save(output_file)
+    manifest = {'version': CACHE_VERSION, 'deck': file_hash(output_file), 'slides': hashes}
+    with open(cache_path(output_file), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return compiled, copied
 
 def main():
     """Main function to generate the PowerPoint presentation"""
-    # Create a presentation object
-    prs = Presentation()
-    prs.slide_width = Inches(10)
-    prs.slide_height = Inches(7.5)
-    
-    # Create title slide
-    create_title_slide(prs)
-    
-    # Create slides for each example
-    create_example1_slides(prs)
-    create_example2_slides(prs)
-    create_example3_slides(prs)
-    create_example4_slides(prs)
-    
-    # Save the presentation in the same directory as the script
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_file = os.path.join(script_dir, 'block_lecture.pptx')
-    prs.save(output_file)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--spec', default=os.path.join(script_dir, 'block_lecture.tex'),
+                        help='lecture .tex or JSON slide spec (default: block_lecture.tex '
+                             'next to this script)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='output file (default: block_lecture.pptx next to this script)')
+    parser.add_argument('--force', action='store_true',
+                        help='compile every slide instead of reusing unchanged ones')
+    args = parser.parse_args()
+
+    # Save the presentation in the same directory as the script
+    output_file = args.output or os.path.join(script_dir, 'block_lecture.pptx')
+    compiled, copied = build_deck(load_spec(args.spec), output_file, args.force)
     print(f"PowerPoint presentation saved to: {output_file}")
-    print(f"Total slides: {len(prs.slides)}")
+    print(f"Total slides: {compiled + copied} ({compiled} compiled, {copied} reused)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Translate slide math between LaTeX and the Unicode forms the deck uses, in
+both directions. latex_to_unicode (a_1 -> a₁, \\sqrt{n} -> √n, \\leq -> ≤)
+is a recursive descent over one combined-regex token stream; unicode_to_latex
+(a₁ -> $a_{1}$, ⌊x⌋ -> $\\lfloor x \\rfloor$) tokenizes once and decides the
+$...$ spans in a single walk. Both cache their result per distinct string,
+so decks that repeat the same paragraphs translate each of them once.
+"""
+
+import argparse
+import re
+import sys
+from functools import lru_cache
+
+# ---------- LaTeX -> Unicode ----------
+
+# Commands that stand for one symbol
+SYMBOLS = {
+    'leq': '≤', 'le': '≤', 'geq': '≥', 'ge': '≥', 'neq': '≠', 'ne': '≠',
+    'times': '×', 'cdot': '·', 'div': '÷', 'pm': '±', 'approx': '≈', 'sim': '∼',
+    'leftarrow': '←', 'gets': '←', 'rightarrow': '→', 'to': '→', 'Rightarrow': '⇒',
+    'ldots': '…', 'dots': '…', 'cdots': '⋯', 'infty': '∞', 'in': '∈',
+    'sum': '∑', 'prod': '∏', 'log': 'log', 'max': 'max', 'min': 'min',
+    'alpha': 'α', 'beta': 'β', 'lambda': 'λ', 'sigma': 'σ', 'Theta': 'Θ',
+    'lfloor': '⌊', 'rfloor': '⌋', 'lceil': '⌈', 'rceil': '⌉',
+    'quad': ' ', 'qquad': ' ', ',': ' ', ';': ' ', ' ': ' ', '\\': ' ',
+    '{': '{', '}': '}', '%': '%', '$': '$', '&': '&', '_': '_', '#': '#',
+}
+
+# Symbols that take no space after them / before them
+OPENING = {'⌊', '⌈'}
+CLOSING = {'⌋', '⌉'}
+
+# Commands whose single argument is kept as plain text
+KEEP_ARGUMENT = {'mathrm', 'mathbf', 'mathit', 'text', 'textbf', 'textit', 'texttt', 'emph',
+                 'boxed', 'operatorname'}
+
+# Commands dropped together with their argument
+DROP_ARGUMENT = {'thispagestyle', 'pagestyle', 'vspace', 'hspace', 'label', 'color'}
+
+SUBSCRIPTS = dict(zip('0123456789+-=()aehijklmnoprstuvx',
+                      '₀₁₂₃₄₅₆₇₈₉₊₋₌₍₎ₐₑₕᵢⱼₖₗₘₙₒₚᵣₛₜᵤᵥₓ'))
+SUPERSCRIPTS = dict(zip('0123456789+-=()abcdefghijklmnoprstuvwxyz',
+                        '⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾ᵃᵇᶜᵈᵉᶠᵍʰⁱʲᵏˡᵐⁿᵒᵖʳˢᵗᵘᵛʷˣʸᶻ'))
+
+# Control words keep the spaces after them (re-emitted unless the symbol opens a group)
+MATH_TOKENS = re.compile(r'\\[a-zA-Z]+[ \t]*|\\.|[_^{}$]|[^\\_^{}$]+')
+
+def _script(arg, table, mark):
+    """arg as Unicode sub/superscripts, or mark + arg when a character has none"""
+    if arg and all(ch in table for ch in arg):
+        return ''.join(table[ch] for ch in arg)
+    return mark + (arg if len(arg) == 1 else f"({arg})")
+
+def _wrap(arg):
+    """arg, parenthesized unless it is a single symbol"""
+    return arg if len(arg) <= 2 or arg.isalnum() else f"({arg})"
+
+class _Translator:
+    """Recursive descent over one string's tokens"""
+
+    def __init__(self, text):
+        self.tokens = MATH_TOKENS.findall(text)
+        self.pos = 0
+
+    def argument(self):
+        """Translated next argument: a {group}, a command or one character"""
+        tokens = self.tokens
+        while self.pos < len(tokens) and tokens[self.pos].isspace():
+            self.pos += 1
+        if self.pos == len(tokens):
+            return ''
+        token = tokens[self.pos]
+        if token == '{':
+            self.pos += 1
+            return self.run(True)
+        if token.startswith('\\'):
+            self.pos += 1
+            return self.command(token).strip()
+        # A plain run: take its first character, leave the rest
+        token = token.lstrip()
+        tokens[self.pos] = token[1:]
+        if not tokens[self.pos]:
+            self.pos += 1
+        return token[0]
+
+    def command(self, token):
+        name = token[1:].rstrip(' \t') or token[1:]
+        space = ' ' if token[len(name) + 1:] else ''
+        if name in SYMBOLS:
+            symbol = SYMBOLS[name]
+            return symbol if symbol in OPENING else symbol + space
+        if name in KEEP_ARGUMENT:
+            return self.argument() + space
+        if name == 'sqrt':
+            return '√' + _wrap(self.argument()) + space
+        if name == 'frac':
+            top = self.argument()
+            return f"{_wrap(top)}/{_wrap(self.argument())}" + space
+        if name in DROP_ARGUMENT:
+            self.argument()
+        # Size and font switches, \maketitle and unknown commands disappear
+        return ''
+
+    def run(self, group=False):
+        out = []
+        tokens = self.tokens
+        while self.pos < len(tokens):
+            token = tokens[self.pos]
+            self.pos += 1
+            if token == '}':
+                if group:
+                    break
+                continue
+            if token == '{':
+                out.append(self.run(True))
+            elif token == '$':
+                continue
+            elif token == '_':
+                out.append(_script(self.argument(), SUBSCRIPTS, '_'))
+            elif token == '^':
+                out.append(_script(self.argument(), SUPERSCRIPTS, '^'))
+            elif token.startswith('\\'):
+                text = self.command(token)
+                if text[:1] in CLOSING and out:
+                    out[-1] = out[-1].rstrip()
+                out.append(text)
+            else:
+                out.append(token)
+        return ''.join(out)
+
+@lru_cache(maxsize=1 << 16)
+def latex_to_unicode(text):
+    """Plain Unicode text of a LaTeX fragment (text with inline $...$ math)"""
+    return ' '.join(_Translator(text).run().split())
+
+
+# ---------- Unicode -> LaTeX ----------
+#
+# The output of the regex cascade convert_math_to_latex.py used to run (about
+# 30 re.sub passes, placeholders for O(...) and ⌊...⌋, then a $...$ merge
+# loop) from three linear scans: symbols are translated in one walk over the
+# characters, one combined regex then finds every span the old passes wrapped
+# in $...$, and one more collapses whitespace around the spans.
+#
+# Three outputs of the cascade were broken and are fixed unless legacy=True
+# asks for its exact bytes:
+#   ⌊O(n)/B⌋  an O(...) inside a floor leaked its placeholder:
+#             $\lfloor @@OBIG0@@/B \rfloor$ (fixed: $\lfloor O(n)/B \rfloor$)
+#   √aᵢ       the index pass reached inside the root:
+#             $\sqrt{$a_{i}$}$ (fixed: $\sqrt{a_{i}}$)
+#   ⌊√n⌋      the floor pass stopped at the root's backslash:
+#             \lfloor $\sqrt{n}$ \rfloor (fixed: $\lfloor \sqrt{n} \rfloor$)
+
+# Subscripts in the order the old passes converted them: a later one only
+# follows a converted one if its pass ran after (aₙᵢ -> a_n_i, aᵢₙ -> a_iₙ)
+SUBSCRIPT_ORDER = '₀₁₂₃₄₅₆₇₈₉ₙᵢᵣ'
+SUBSCRIPT_BASES = dict(zip(SUBSCRIPT_ORDER, '0123456789nir'))
+SUBSCRIPT_RANKS = {ch: rank for rank, ch in enumerate(SUBSCRIPT_ORDER)}
+
+SYMBOL_COMMANDS = {'⌊': '\\lfloor ', '⌋': ' \\rfloor', '≤': ' \\leq ', '≥': ' \\geq ',
+                   '≠': ' \\neq ', '←': ' \\leftarrow ', '→': ' \\rightarrow '}
+
+LETTERS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+DIGITS = frozenset('0123456789')
+
+# O(...) up to the first ')', protected from wrapping as a whole
+O_SPAN = r'O\([^)]+\)'
+
+# A letter with an index, or digits with a power: \b in front, except right
+# after a ⌊...⌋ span, where the old placeholder made a boundary
+SCRIPT = r"""
+    {lead}(?P<base>[a-zA-Z])_(?:\{{(?P<braced>[a-zA-Z0-9]+)\}}
+                               |(?P<index>(?:(?!{o})[a-zA-Z0-9])+)(?:\b|(?={o})))
+  | {lead}(?P<digits>[0-9]+)\^(?P<power>[0-9]+)(?:\b|(?={o}))
+"""
+
+# Every span the old passes wrapped, leftmost first. An O(...) inside ⌊...⌋
+# is skipped whole; an arrow gives way when the old \leq pass, which ran
+# first, took the space it shares with the next relation.
+SPAN_PATTERN = r"""
+    (?P<o>{o})
+  | \\lfloor\s+(?P<floor>(?:(?>{o}){root}|(?!{o})[^\\])+?)\s+\\rfloor
+  | \\sqrt\{{(?P<root>[a-zA-Z0-9_]+)\}}
+  | {script}
+  | \s\\(?P<relation>leq|geq|neq)\s
+  | \s\\(?P<arrow>leftarrow|rightarrow)\s(?!\\(?:leq|geq|neq)\s)
+"""
+SCRIPT_SPAN = SCRIPT.format(lead=r'\b', o=O_SPAN)
+ROOT = r'\\sqrt\{([a-zA-Z0-9_]+)\}'
+# A floor may hold a root, except in the legacy spans
+SPANS = re.compile(SPAN_PATTERN.format(o=O_SPAN, root='|' + ROOT, script=SCRIPT_SPAN), re.X)
+LEGACY_SPANS = re.compile(SPAN_PATTERN.format(o=O_SPAN, root='', script=SCRIPT_SPAN), re.X)
+AFTER_FLOOR = re.compile(SCRIPT.format(lead='', o=O_SPAN), re.X)
+FLOOR_ROOT = re.compile(ROOT)
+
+# One symbol character, or a run of anything else
+PIECES = re.compile('[₀₁₂₃₄₅₆₇₈₉ₙᵢᵣ⁹√⌊⌋≤≥≠←→]|[^₀₁₂₃₄₅₆₇₈₉ₙᵢᵣ⁹√⌊⌋≤≥≠←→]+')
+ROOT_RUN = re.compile('[a-zA-Z0-9_]*')
+SUB_WRAP = re.compile(r'\b([a-zA-Z])_([a-zA-Z0-9]+)\b')
+CLEANUP = re.compile(r'\s*(?:\$\s*\$\s*)+|,\$(?!\s*\$)|\s+')
+
+def _symbols(text):
+    """text with its Unicode symbols replaced by LaTeX commands (nothing wrapped yet)"""
+    out = []
+    prev = ''       # character the old symbol passes saw before this piece
+    rank = -1       # order of prev's subscript pass, -1 when prev was no subscript
+    root = None     # open √: whether its run has a character yet
+    for piece in PIECES.findall(text):
+        if piece in SUBSCRIPT_BASES and prev in LETTERS and rank < SUBSCRIPT_RANKS[piece]:
+            latex = '_' + SUBSCRIPT_BASES[piece]
+            prev, rank = SUBSCRIPT_BASES[piece], SUBSCRIPT_RANKS[piece]
+        elif piece == '⁹' and prev in DIGITS:
+            latex = '^9'
+            prev, rank = piece, -1
+        else:
+            latex = SYMBOL_COMMANDS.get(piece, piece)
+            prev, rank = piece[-1], -1
+        if root is not None:
+            # √ takes the [a-zA-Z0-9_] run after it, converted subscripts included
+            run = ROOT_RUN.match(latex).end()
+            if run:
+                out.append(latex[:run])
+                root = True
+                latex = latex[run:]
+                if not latex:
+                    continue
+            out.append('}' if root else 'n}')
+            root = None
+        if piece == '√':
+            out.append('\\sqrt{')
+            root = False
+        else:
+            out.append(latex)
+    if root is not None:
+        out.append('}' if root else 'n}')
+    return ''.join(out)
+
+def _script_span(m):
+    if m.group('base'):
+        return f"${m.group('base')}_{{{m.group('braced') or m.group('index')}}}$"
+    return f"${m.group('digits')}^{{{m.group('power')}}}$"
+
+def _radicand(root):
+    """A root's [a-zA-Z0-9_] run with its indices braced: a_i -> a_{i}"""
+    return SUB_WRAP.sub(r'\1_{\2}', root)
+
+def _spans(text, legacy=False):
+    """text with the spans the old passes wrapped in $...$, before the cleanup"""
+    out = []
+    count = 0       # O(...) spans so far; the old placeholders were numbered
+    pos = 0
+    spans = LEGACY_SPANS if legacy else SPANS
+    while True:
+        m = spans.search(text, pos)
+        if m is None:
+            out.append(text[pos:])
+            return ''.join(out)
+        out.append(text[pos:m.start()])
+        pos = m.end()
+        if m.group('o'):
+            out.append(f"${m.group('o')}$")
+            count += 1
+        elif m.group('floor'):
+            expr = m.group('floor')
+            if legacy:
+                # An O(...) inside kept its placeholder: the old code restored
+                # O(...) before the floors that contained them
+                def placeholder(_):
+                    nonlocal count
+                    count += 1
+                    return f"@@OBIG{count - 1}@@"
+                expr = re.sub(O_SPAN, placeholder, expr)
+            else:
+                expr = FLOOR_ROOT.sub(lambda root: f"\\sqrt{{{_radicand(root.group(1))}}}", expr)
+            out.append(f"$\\lfloor {expr} \\rfloor$")
+            after = AFTER_FLOOR.match(text, pos)
+            if after:
+                out.append(_script_span(after))
+                pos = after.end()
+        elif m.group('root'):
+            # The old index pass also reached inside: √aᵢ -> $\sqrt{$a_{i}$}$
+            root = SUB_WRAP.sub(r'$\1_{\2}$', m.group('root')) if legacy else _radicand(m.group('root'))
+            out.append(f"$\\sqrt{{{root}}}$")
+        elif m.group('relation') or m.group('arrow'):
+            out.append(f"$\\{m.group('relation') or m.group('arrow')}$")
+        else:
+            out.append(_script_span(m))
+
+def _cleanup(match):
+    """$ $ between two spans merges them, ,$ gets a space, whitespace collapses"""
+    return ', $' if match.group() == ',$' else ' '
+
+@lru_cache(maxsize=1 << 16)
+def unicode_to_latex(text, legacy=False):
+    """
+    LaTeX notation of a slide paragraph: Unicode math symbols translated and
+    wrapped in $...$. legacy=True reproduces the old cascade byte for byte,
+    including its three broken cases (see above).
+    """
+    if not text or not text.strip():
+        return text
+    return CLEANUP.sub(_cleanup, _spans(_symbols(text), legacy))
+
+def main():
+    """Translate text from the arguments, or one paragraph per stdin line"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('text', nargs='*', help='paragraphs (default: read stdin)')
+    parser.add_argument('--to-unicode', action='store_true',
+                        help='translate LaTeX to Unicode (default: Unicode to LaTeX)')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Unicode to LaTeX exactly as convert_math_to_latex.py used to')
+    args = parser.parse_args()
+
+    lines = args.text or (line.rstrip('\n') for line in sys.stdin)
+    for line in lines:
+        print(latex_to_unicode(line) if args.to_unicode else unicode_to_latex(line, args.legacy))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline query mode (Mo's algorithm) for traces known in advance.
+Range "count of c" (Example 2) and "count of >= k" (Example 4) queries are
+reordered along a Hilbert curve over (l, r) and answered by moving the two
+window ends; every move adds or removes a whole slice at once with NumPy.
+Mixed traces with point updates use Mo with updates (time as a third axis).
+"""
+
+import sys
+
+import numpy as np
+
+from block_common import load_input
+
+def hilbert_keys(l, r, n):
+    """Position of each (l, r) pair on a Hilbert curve covering [0, n)²"""
+    side = 1 << max(1, (max(n, 2) - 1).bit_length())
+    x = np.array(l, dtype=np.int64)
+    y = np.array(r, dtype=np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        turn = ~ry
+        flip = turn & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(turn, y, x), np.where(turn, x, y)
+        s >>= 1
+    return d
+
+def mo_order(l, r, n):
+    """Query order for Mo's algorithm: 0-based [l, r] sorted along a Hilbert curve"""
+    return np.argsort(hilbert_keys(l, r, n), kind='stable')
+
+def mo_update_order(l, r, t, n, updates):
+    """
+    Query order for Mo with updates: blocks of about n^(2/3) on l and r, then
+    time, with alternating directions so consecutive queries stay close.
+    """
+    B = max(1, round(n ** (2 / 3)) if updates else round(n ** 0.5))
+    lb = np.asarray(l) // B
+    rb = np.asarray(r) // B
+    t = np.asarray(t)
+    rkey = np.where(lb % 2 == 0, rb, -rb)
+    tkey = np.where(rb % 2 == 0, t, -t)
+    return np.lexsort((tkey, rkey, lb))
+
+class _ValueCounts:
+    """Multiset of value codes in the window, with value-block totals for >= queries"""
+
+    def __init__(self, domain):
+        self.shift = max(0, (max(domain, 1).bit_length() + 1) // 2)
+        self.cnt = np.zeros(domain + 1, dtype=np.int64)
+        self.blocks = np.zeros((domain >> self.shift) + 2, dtype=np.int64)
+
+    def add(self, codes, sign=1):
+        """Add (or with sign=-1 remove) a slice of codes"""
+        if len(codes):
+            np.add.at(self.cnt, codes, sign)
+            np.add.at(self.blocks, codes >> self.shift, sign)
+
+    def equal(self, code):
+        """Number of window elements with this code"""
+        return int(self.cnt[code])
+
+    def at_least(self, code):
+        """Number of window elements with code >= code"""
+        b = code >> self.shift
+        return int(self.blocks[b + 1:].sum() + self.cnt[code:(b + 1) << self.shift].sum())
+
+def _compress(values, extra=()):
+    """Codes of values over the sorted distinct values of values and extra"""
+    pool = np.concatenate((np.asarray(values, dtype=np.int64),
+                           np.asarray(extra, dtype=np.int64)))
+    uniq = np.unique(pool)
+    return np.searchsorted(uniq, np.asarray(values, dtype=np.int64)), uniq
+
+def _query_code(uniq, x, kind):
+    """Code answering a query about value x (-1 when c does not occur at all)"""
+    i = int(np.searchsorted(uniq, x))
+    if kind == 'equal' and (i == len(uniq) or uniq[i] != x):
+        return -1
+    return i
+
+def _move(counts, codes, cur_l, cur_r, l, r):
+    """Slide the window [cur_l, cur_r] to [l, r], adding and removing slices"""
+    if l < cur_l:
+        counts.add(codes[l:cur_l])
+    if r > cur_r:
+        counts.add(codes[cur_r + 1:r + 1])
+    if l > cur_l:
+        counts.add(codes[cur_l:l], -1)
+    if r < cur_r:
+        counts.add(codes[r + 1:cur_r + 1], -1)
+
+def _answer(counts, code, kind):
+    if kind == 'equal':
+        return counts.equal(code) if code >= 0 else 0
+    return counts.at_least(code)
+
+def mo_queries(values, l, r, x, kind='at-least'):
+    """
+    Answer read-only queries over 1-based [l, r]: kind 'equal' counts a_i == x,
+    'at-least' counts a_i >= x. Returns the answers in input order.
+    """
+    codes, uniq = _compress(values)
+    l0 = np.asarray(l, dtype=np.int64) - 1
+    r0 = np.asarray(r, dtype=np.int64) - 1
+    xs = np.asarray(x).tolist()
+    counts = _ValueCounts(len(uniq))
+    answers = [0] * len(xs)
+    cur_l, cur_r = 0, -1
+    for i in mo_order(l0, r0, len(codes)).tolist():
+        lo = int(l0[i])
+        hi = int(r0[i])
+        _move(counts, codes, cur_l, cur_r, lo, hi)
+        cur_l, cur_r = lo, hi
+        answers[i] = _answer(counts, _query_code(uniq, xs[i], kind), kind)
+    return answers
+
+def mo_with_updates(values, is_query, l, r, x, kind='at-least'):
+    """
+    Answer a mixed trace in order: query rows count over 1-based [l, r] as in
+    mo_queries, update rows assign a_l = x (l == r). Each query sees every
+    update before it. Returns the query answers in input order.
+    """
+    is_query = np.asarray(is_query, dtype=bool)
+    upd = ~is_query
+    l = np.asarray(l, dtype=np.int64)
+    r = np.asarray(r, dtype=np.int64)
+    x = np.asarray(x, dtype=np.int64)
+    if np.any(l[upd] != r[upd]):
+        raise ValueError("Mo with updates needs point updates (l == r)")
+    codes, uniq = _compress(values, x[upd])
+    codes = codes.copy()
+    # Update k sets position pos[k] to code new[k]; old[k] is filled in as
+    # the sweep applies it, so it can be undone
+    pos = (l[upd] - 1).tolist()
+    new = np.searchsorted(uniq, x[upd]).tolist()
+    old = [0] * len(pos)
+    # Time of a query = number of updates before it
+    times = np.cumsum(upd)[is_query]
+    ql = l[is_query] - 1
+    qr = r[is_query] - 1
+    qx = x[is_query].tolist()
+    counts = _ValueCounts(len(uniq))
+    answers = [0] * len(qx)
+    cur_l, cur_r, now = 0, -1, 0
+    for i in mo_update_order(ql, qr, times, len(codes), len(pos)).tolist():
+        lo = int(ql[i])
+        hi = int(qr[i])
+        t = int(times[i])
+        _move(counts, codes, cur_l, cur_r, lo, hi)
+        cur_l, cur_r = lo, hi
+        # Replay or undo updates until the array matches time t
+        while now < t:
+            p = pos[now]
+            old[now] = int(codes[p])
+            if lo <= p <= hi:
+                counts.add(codes[p:p + 1], -1)
+            codes[p] = new[now]
+            if lo <= p <= hi:
+                counts.add(codes[p:p + 1])
+            now += 1
+        while now > t:
+            now -= 1
+            p = pos[now]
+            if lo <= p <= hi:
+                counts.add(codes[p:p + 1], -1)
+            codes[p] = old[now]
+            if lo <= p <= hi:
+                counts.add(codes[p:p + 1])
+        answers[i] = _answer(counts, _query_code(uniq, qx[i], kind), kind)
+    return answers
+
+def mo_run(problem, values, opt, l, r, c):
+    """
+    Answer a Q2 or Q4 input offline. Q4 may mix A queries with single-point
+    M growth; Q2 operations must be single points (count, then assign).
+    Range updates raise ValueError: use the online engines for those traces.
+    """
+    opt = np.asarray(opt)
+    l = np.asarray(l, dtype=np.int64)
+    r = np.asarray(r, dtype=np.int64)
+    c = np.asarray(c, dtype=np.int64)
+    if problem == 4:
+        growth = opt == 0
+        if not growth.any():
+            return mo_queries(values, l, r, c, 'at-least')
+        if np.any(l[growth] != r[growth]):
+            raise ValueError("Mo's algorithm needs point growth (M i i h)")
+        # Turn each growth into an assignment of the height it produces
+        current = np.array(values, dtype=np.int64)
+        x = c.copy()
+        for k in np.flatnonzero(growth).tolist():
+            p = int(l[k]) - 1
+            current[p] += c[k]
+            x[k] = current[p]
+        return mo_with_updates(values, ~growth, l, r, x, 'at-least')
+    if problem == 2:
+        if np.any(l != r):
+            raise ValueError("Mo's algorithm needs point operations for Q2 (count, then assign)")
+        # Every operation is a query followed by an assignment of the same c
+        q = len(l)
+        is_query = np.tile([True, False], q)
+        return mo_with_updates(values, is_query, np.repeat(l, 2), np.repeat(r, 2),
+                               np.repeat(c, 2), 'equal')
+    raise ValueError(f"no offline mode for Q{problem}")
+
+def main():
+    """Answer a Q2/Q4 input offline: mo_offline.py PROBLEM [INPUT]"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('2', '4'):
+        print(main.__doc__, file=sys.stderr)
+        return 2
+    problem = int(sys.argv[1])
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    values, opt, l, r, c = load_input(path, problem)
+    try:
+        answers = mo_run(problem, values, opt, l, r, c)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Block-decomposition engine for Example 1 (Q1.md): range add, range multiply
+and point query. Values and the per-block affine tags mul[i] / add[i] live in
+int32 BlockStorage arrays; all arithmetic is modulo MOD as in the original
+problem.
+"""
+
+import sys
+
+import numpy as np
+
+from block_common import default_block_size, load_input, whole_range
+from block_storage import BlockStorage
+
+# Modulus of the original problem (LOJ 6283)
+MOD = 10007
+
+class Q1BlockEngine:
+    """Range add / range multiply / point query over √n blocks with affine tags"""
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        values = np.asarray(values)
+        self.n = len(values)
+        self.block_size = block_size or default_block_size(self.n)
+        # storage: BlockStorage factory (n, block_size), e.g. a MappedBlockStorage
+        self.store = store = (storage or BlockStorage)(self.n, self.block_size)
+        # Everything stays below MOD, and MOD² fits in int32
+        self.a = store.add_plane('values', np.int32)
+        self.a[:] = values % MOD
+        # Block i represents x -> x * mul[i] + add[i]
+        self.mul = store.add_meta('mul', np.int32, 1)
+        self.add = store.add_meta('add', np.int32, 0)
+        # Optional block_stats.BlockStats instrumentation
+        self.stats = stats
+
+    def _pushdown(self, b):
+        """Apply block b's tag to its elements and reset the tag"""
+        m = self.mul[b]
+        d = self.add[b]
+        if m != 1 or d != 0:
+            seg = self.store.writable(b)
+            seg *= m
+            seg += d
+            seg %= MOD
+            self.store.mark_dirty(b)
+            self.mul[b] = 1
+            self.add[b] = 0
+            if self.stats is not None:
+                self.stats.pushdowns += 1
+
+    def _apply(self, b, start, stop, opt, c):
+        """Apply the update to elements [start, stop) of block b (tag already pushed)"""
+        store = self.store
+        base = b * self.block_size
+        seg = store.writable(b)[start - base:stop - base]
+        if opt == 0:
+            seg += c
+        else:
+            seg *= c
+        seg %= MOD
+        store.mark_dirty(b)
+
+    def _update(self, opt, l, r, c):
+        """Apply x -> x + c (opt 0) or x -> x * c (opt 1) on 0-based [l, r]"""
+        B = self.block_size
+        c %= MOD
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        stats = self.stats
+
+        # Partial blocks: push the tag down, then modify the covered slice
+        if bl == br and wl > wr:
+            if stats is not None:
+                stats.touched += r + 1 - l
+            self._pushdown(bl)
+            self._apply(bl, l, r + 1, opt, c)
+            return
+        if stats is not None:
+            stats.touched += (wl != bl) * ((bl + 1) * B - l) + (wr != br) * (r + 1 - br * B)
+            stats.whole += max(0, wr + 1 - wl)
+        if wl != bl:
+            self._pushdown(bl)
+            self._apply(bl, l, (bl + 1) * B, opt, c)
+        if wr != br:
+            self._pushdown(br)
+            self._apply(br, br * B, r + 1, opt, c)
+
+        # Whole blocks: compose the affine tags of wl .. wr in one slice
+        if wl <= wr:
+            if opt == 0:
+                tags = self.add[wl:wr + 1]
+                tags += c
+                tags %= MOD
+            else:
+                for tags in (self.mul[wl:wr + 1], self.add[wl:wr + 1]):
+                    tags *= c
+                    tags %= MOD
+
+    def add_range(self, l, r, c):
+        """Add c to every a_i with l <= i <= r (1-based)"""
+        self._update(0, l - 1, r - 1, c)
+
+    def multiply_range(self, l, r, c):
+        """Multiply every a_i with l <= i <= r (1-based) by c"""
+        self._update(1, l - 1, r - 1, c)
+
+    def query(self, r):
+        """Return a_r (1-based) modulo MOD"""
+        i = r - 1
+        B = self.block_size
+        b = i // B
+        return int((self.store.data(b)[i - b * B] * self.mul[b] + self.add[b]) % MOD)
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays and return the
+        answers of the point queries (opt 2) in order.
+        """
+        answers = []
+        update = self._update
+        query = self.query
+        stats = self.stats
+        for o, lo, hi, x in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                                np.asarray(r).tolist(), np.asarray(c).tolist()):
+            if o == 2:
+                answers.append(query(hi))
+            else:
+                update(o, lo - 1, hi - 1, x)
+            if stats is not None:
+                stats.end_op(o)
+        return answers
+
+    def to_array(self):
+        """Return the current values as a new array"""
+        sizes = self.store.sizes()
+        self.store.flush()
+        return (self.store.plane() * np.repeat(self.mul, sizes) + np.repeat(self.add, sizes)) % MOD
+
+def main():
+    """Solve a Q1 input file (or stdin) and print the query answers"""
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    values, opt, l, r, c = load_input(path, 1)
+    engine = Q1BlockEngine(values)
+    answers = engine.run(opt, l, r, c)
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
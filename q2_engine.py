@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Block-decomposition engine for Example 2 (Q2.md): count the elements equal
+to c in [l, r], then assign c to [l, r]. Tagged blocks use the tag[i] mark
+from the slides; untagged blocks keep a sorted copy of their values, so a
+whole-block count is a tag compare or two binary searches.
+
+Trade-off: the sorted copy replaced a per-block value -> count dictionary
+that partial writes updated incrementally and that answered an untagged
+whole block in O(1). The dictionary cost about 50 bytes per element against
+4 for an int32 sorted copy, and its incremental update (np.unique of the
+written slice, then a dictionary walk) took about 4x as long as re-sorting
+a 1000-element block. So a partial write now re-sorts its block in O(B log B),
+and an untagged whole block costs O(log B) instead of O(1).
+
+Also provides a run-length interval map backend (Chtholly tree) and an
+adaptive engine that switches between the two as the run count changes.
+"""
+
+import math
+import sys
+from bisect import bisect_right
+
+import numpy as np
+
+from block_common import default_block_size, load_input, whole_range
+from block_storage import BlockStorage, fit_dtype
+
+class Q2BlockEngine:
+    """Count-then-assign over √n blocks with assignment tags and sorted block copies"""
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        values = np.asarray(values, dtype=np.int64)
+        self.n = len(values)
+        self.block_size = block_size or default_block_size(self.n)
+        # storage: BlockStorage factory (n, block_size), e.g. a MappedBlockStorage
+        self.store = store = (storage or BlockStorage)(self.n, self.block_size)
+        self.sizes = store.sizes()
+        # int32 unless the input needs more; widened when an assignment does
+        lo, hi = (int(values.min()), int(values.max())) if self.n else (0, 0)
+        dtype = fit_dtype(lo, hi)
+        self.bounds = np.iinfo(dtype)
+        self.a = store.add_plane('values', dtype)
+        self.a[:] = values
+        # sorted: each untagged block's values in order, so counting c in a
+        # whole block is two binary searches (stale while the block is tagged)
+        self.sorted = store.add_plane('sorted', dtype)
+        for b in range(store.nblocks):
+            self._resort(b)
+        # tag[i] is only meaningful where tagged[i] is set (values may be negative)
+        self.tag = store.add_meta('tag', dtype)
+        self.tagged = store.add_meta('tagged', bool, False)
+        # Optional block_stats.BlockStats instrumentation
+        self.stats = stats
+
+    def _resort(self, b):
+        """Rebuild the sorted copy of block b from its values"""
+        store = self.store
+        srt = store.writable(b, 'sorted')
+        srt[:] = store.data(b)
+        srt.sort()
+        store.mark_dirty(b, 'sorted')
+
+    def _widen(self):
+        """Move every value array to int64 once an assignment leaves int32"""
+        store = self.store
+        self.a = store.retype('values', np.int64)
+        self.sorted = store.retype('sorted', np.int64)
+        self.tag = store.retype('tag', np.int64)
+        self.bounds = np.iinfo(np.int64)
+
+    def _pushdown(self, b):
+        """Write block b's tag into its elements and its sorted copy"""
+        if self.tagged[b]:
+            store = self.store
+            v = self.tag[b]
+            store.writable(b)[:] = v
+            store.writable(b, 'sorted')[:] = v
+            store.mark_dirty(b)
+            store.mark_dirty(b, 'sorted')
+            self.tagged[b] = False
+            if self.stats is not None:
+                self.stats.pushdowns += 1
+
+    def _partial(self, b, start, stop, c):
+        """Count c in a[start:stop] inside block b and assign c there"""
+        self._pushdown(b)
+        if self.stats is not None:
+            self.stats.touched += stop - start
+            self.stats.rebuilds += 1
+        base = b * self.block_size
+        seg = self.store.writable(b)[start - base:stop - base]
+        found = int(np.count_nonzero(seg == c))
+        if found < stop - start:
+            seg[:] = c
+            self.store.mark_dirty(b)
+            self._resort(b)
+        return found
+
+    def _count_whole(self, wl, wr, c):
+        """Count c in whole blocks wl..wr (inclusive)"""
+        if self.stats is not None:
+            self.stats.whole += wr + 1 - wl
+        tagged = self.tagged[wl:wr + 1]
+        hit = tagged & (self.tag[wl:wr + 1] == c)
+        found = int(self.sizes[wl:wr + 1][hit].sum())
+        if not self.bounds.min <= c <= self.bounds.max:
+            # No stored value can equal c
+            return found
+        # A key of the plane's own dtype keeps searchsorted off its slow conversion path
+        key = self.sorted.dtype.type(c)
+        data = self.store.data
+        search = np.searchsorted
+        for b in (np.flatnonzero(~tagged) + wl).tolist():
+            srt = data(b, 'sorted')
+            found += int(search(srt, key, 'right') - search(srt, key, 'left'))
+        return found
+
+    def _whole(self, wl, wr, c):
+        """Count c in whole blocks wl..wr (inclusive), then tag them with c"""
+        found = self._count_whole(wl, wr, c)
+        self.tag[wl:wr + 1] = c
+        self.tagged[wl:wr + 1] = True
+        return found
+
+    def _count_partial(self, b, start, stop, c):
+        """Count c in a[start:stop] inside block b, leaving it unchanged"""
+        if self.stats is not None:
+            self.stats.touched += stop - start
+        if self.tagged[b]:
+            return stop - start if self.tag[b] == c else 0
+        base = b * self.block_size
+        return int(np.count_nonzero(self.store.data(b)[start - base:stop - base] == c))
+
+    def _count(self, l, r, c):
+        """Count c on 0-based [l, r] without assigning"""
+        B = self.block_size
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        if bl == br and wl > wr:
+            return self._count_partial(bl, l, r + 1, c)
+        found = 0
+        if wl != bl:
+            found += self._count_partial(bl, l, (bl + 1) * B, c)
+        if wr != br:
+            found += self._count_partial(br, br * B, r + 1, c)
+        if wl <= wr:
+            found += self._count_whole(wl, wr, c)
+        return found
+
+    def _operate(self, l, r, c):
+        """Count-then-assign on 0-based [l, r]"""
+        if not self.bounds.min <= c <= self.bounds.max:
+            self._widen()
+        B = self.block_size
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        if bl == br and wl > wr:
+            return self._partial(bl, l, r + 1, c)
+
+        found = 0
+        if wl != bl:
+            found += self._partial(bl, l, (bl + 1) * B, c)
+        if wr != br:
+            found += self._partial(br, br * B, r + 1, c)
+        if wl <= wr:
+            found += self._whole(wl, wr, c)
+        return found
+
+    def count_assign(self, l, r, c):
+        """Return how many a_i == c for l <= i <= r (1-based), then set them to c"""
+        return self._operate(l - 1, r - 1, c)
+
+    def count(self, l, r, c):
+        """Return how many a_i == c for l <= i <= r (1-based), without assigning"""
+        return self._count(l - 1, r - 1, c)
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays and return the
+        count of every operation in order. opt is ignored (Q2 has one operation).
+        """
+        operate = self._operate
+        stats = self.stats
+        if stats is None:
+            return [operate(lo - 1, hi - 1, x)
+                    for lo, hi, x in zip(np.asarray(l).tolist(), np.asarray(r).tolist(),
+                                         np.asarray(c).tolist())]
+        answers = []
+        for lo, hi, x in zip(np.asarray(l).tolist(), np.asarray(r).tolist(),
+                             np.asarray(c).tolist()):
+            answers.append(operate(lo - 1, hi - 1, x))
+            stats.end_op(0)
+        return answers
+
+    def to_array(self):
+        """Return the current values as a new array"""
+        self.store.flush()
+        out = self.store.plane().astype(np.int64)
+        B = self.block_size
+        for b in np.flatnonzero(self.tagged).tolist():
+            out[b * B:(b + 1) * B] = self.tag[b]
+        return out
+
+class Q2IntervalEngine:
+    """Count-then-assign over an ordered map of maximal equal-value runs"""
+
+    def __init__(self, values, block_size=None):
+        a = np.asarray(values, dtype=np.int64)
+        self.n = len(a)
+        # block_size is accepted for API compatibility with the block engines
+        self.block_size = block_size
+        cuts = np.flatnonzero(a[1:] != a[:-1]) + 1
+        # Run k covers [starts[k], starts[k + 1]) and holds vals[k]
+        self.starts = [0] + cuts.tolist() if self.n else []
+        self.vals = a[self.starts].tolist()
+
+    @property
+    def runs(self):
+        """Number of maximal runs currently stored"""
+        return len(self.starts)
+
+    def _operate(self, l, r, c):
+        """Count-then-assign on 0-based [l, r]"""
+        starts = self.starts
+        vals = self.vals
+        last = len(starts) - 1
+        i = bisect_right(starts, l) - 1
+        j = bisect_right(starts, r, i) - 1
+
+        found = 0
+        for k in range(i, j + 1):
+            if vals[k] == c:
+                s = starts[k] if starts[k] > l else l
+                e = starts[k + 1] if k < last else self.n
+                found += (e if e <= r else r + 1) - s
+
+        # Split at l and r + 1, insert [l, r] = c and merge equal neighbours
+        lo = i - 1 if i > 0 else i
+        hi = j + 2 if j < last else j + 1
+        pieces = []
+        if lo < i:
+            pieces.append((starts[lo], vals[lo]))
+        if starts[i] < l:
+            pieces.append((starts[i], vals[i]))
+        pieces.append((l, c))
+        end_j = starts[j + 1] if j < last else self.n
+        if end_j > r + 1:
+            pieces.append((r + 1, vals[j]))
+        if hi > j + 1:
+            pieces.append((starts[j + 1], vals[j + 1]))
+
+        new_starts = []
+        new_vals = []
+        for s, v in pieces:
+            if not new_vals or new_vals[-1] != v:
+                new_starts.append(s)
+                new_vals.append(v)
+        starts[lo:hi] = new_starts
+        vals[lo:hi] = new_vals
+        return found
+
+    def count_assign(self, l, r, c):
+        """Return how many a_i == c for l <= i <= r (1-based), then set them to c"""
+        return self._operate(l - 1, r - 1, c)
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays and return the
+        count of every operation in order. opt is ignored (Q2 has one operation).
+        """
+        operate = self._operate
+        return [operate(lo - 1, hi - 1, x)
+                for lo, hi, x in zip(np.asarray(l).tolist(), np.asarray(r).tolist(),
+                                     np.asarray(c).tolist())]
+
+    def to_array(self):
+        """Return the current values as a new array"""
+        lengths = np.diff(np.append(self.starts, self.n))
+        return np.repeat(np.array(self.vals, dtype=np.int64), lengths)
+
+class Q2AdaptiveEngine:
+    """
+    Q2 engine that runs on the block backend while the array is fragmented and
+    on the interval map once it collapses to few runs, switching at runtime.
+    """
+
+    def __init__(self, values, block_size=None, check_every=None, stats=None, storage=None):
+        a = np.array(values, dtype=np.int64)
+        self.n = len(a)
+        self.block_size = block_size or default_block_size(self.n)
+        # Hysteresis thresholds on the live run count
+        self.low_runs = max(1, math.isqrt(self.n))
+        self.high_runs = 4 * self.low_runs
+        # The block backend does not track runs; count them every check_every ops
+        self.check_every = check_every or max(1, self.n // self.block_size)
+        self.switches = 0
+        self._since_check = 0
+        # Instrumentation covers the block backend; the interval map has no blocks
+        self.stats = stats
+        # Storage factory for the block backend (the interval map is in memory)
+        self.storage = storage
+        if _count_runs(a) <= self.low_runs:
+            self.engine = Q2IntervalEngine(a, self.block_size)
+        else:
+            self.engine = Q2BlockEngine(a, self.block_size, self.stats, storage)
+
+    @property
+    def backend(self):
+        """Name of the active backend ('interval' or 'block')"""
+        return 'interval' if isinstance(self.engine, Q2IntervalEngine) else 'block'
+
+    def _maybe_switch(self):
+        """Move to the other backend when the run count crosses a threshold"""
+        engine = self.engine
+        if isinstance(engine, Q2IntervalEngine):
+            if engine.runs > self.high_runs:
+                self.engine = Q2BlockEngine(engine.to_array(), self.block_size, self.stats,
+                                            self.storage)
+                self.switches += 1
+            return
+        self._since_check += 1
+        if self._since_check < self.check_every:
+            return
+        self._since_check = 0
+        a = engine.to_array()
+        if _count_runs(a) <= self.low_runs:
+            self.engine = Q2IntervalEngine(a, self.block_size)
+            engine.store.close()
+            self.switches += 1
+
+    def count_assign(self, l, r, c):
+        """Return how many a_i == c for l <= i <= r (1-based), then set them to c"""
+        found = self.engine._operate(l - 1, r - 1, c)
+        self._maybe_switch()
+        if self.stats is not None:
+            self.stats.end_op(0)
+        return found
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays and return the
+        count of every operation in order. opt is ignored (Q2 has one operation).
+        """
+        answers = []
+        switch = self._maybe_switch
+        stats = self.stats
+        for lo, hi, x in zip(np.asarray(l).tolist(), np.asarray(r).tolist(),
+                             np.asarray(c).tolist()):
+            answers.append(self.engine._operate(lo - 1, hi - 1, x))
+            switch()
+            if stats is not None:
+                stats.end_op(0)
+        return answers
+
+    def to_array(self):
+        """Return the current values as a new array"""
+        return self.engine.to_array()
+
+def _count_runs(a):
+    """Number of maximal equal-value runs in a"""
+    if len(a) == 0:
+        return 0
+    return 1 + int(np.count_nonzero(a[1:] != a[:-1]))
+
+def main():
+    """Solve a Q2 input file (or stdin) and print the answers"""
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    values, opt, l, r, c = load_input(path, 2)
+    engine = Q2AdaptiveEngine(values)
+    answers = engine.run(opt, l, r, c)
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Block-decomposition engine for Example 3 (Q3.md): range sqrt and range sum.
+Each block keeps sum[i] and max[i]; blocks with max[i] <= 1 have converged
+and are unlinked from a next-live-block pointer array, so a range sqrt only
+visits live blocks. Live blocks are square-rooted in one vectorized pass.
+
+Q3FenwickEngine is an alternative backend with the same API: a union-find
+pointer to the next element > 1 plus a Fenwick tree for range sums, with no
+√n factor anywhere.
+"""
+
+import math
+import sys
+from array import array
+
+import numpy as np
+
+from block_common import default_block_size, load_input, whole_range
+from block_storage import BlockStorage
+
+_U32_MAX = np.uint64(0xFFFFFFFF)
+_ONE = np.uint64(1)
+
+def isqrt_u64(x):
+    """Exact elementwise ⌊√x⌋ of a uint64 array"""
+    s = np.sqrt(x.astype(np.float64)).astype(np.uint64)
+    # float64 rounding may leave s off by one; keep s*s in range, then fix up
+    np.minimum(s, _U32_MAX, out=s)
+    while True:
+        over = s * s > x
+        if not over.any():
+            break
+        s -= over
+    while True:
+        under = (s < _U32_MAX) & ((s + _ONE) * (s + _ONE) <= x)
+        if not under.any():
+            break
+        s += under
+    return s
+
+def exact_sum(x):
+    """Sum of a uint32/uint64 array as a Python int, without 64-bit overflow"""
+    if x.dtype.itemsize <= 4:
+        return int(x.sum(dtype=np.uint64))
+    hi = int((x >> np.uint64(32)).sum(dtype=np.uint64))
+    lo = int((x & _U32_MAX).sum(dtype=np.uint64))
+    return (hi << 32) + lo
+
+class Q3BlockEngine:
+    """Range sqrt / range sum over √n blocks with a converged-block skip index"""
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        values = np.asarray(values, dtype=np.uint64)
+        self.n = len(values)
+        self.block_size = block_size or default_block_size(self.n)
+        # storage: BlockStorage factory (n, block_size), e.g. a MappedBlockStorage
+        self.store = store = (storage or BlockStorage)(self.n, self.block_size)
+        top = int(values.max()) if self.n else 0
+        # sqrt never grows a value, so uint32 is enough whenever the input is
+        dtype = np.uint32 if top <= 0xFFFFFFFF else np.uint64
+        self.a = store.add_plane('values', dtype)
+        self.a[:] = values
+        starts = np.arange(0, self.n, self.block_size)
+        self.max = store.add_meta('max', dtype)
+        if self.n:
+            self.max[:] = np.maximum.reduceat(self.a, starts)
+        # Block sums can exceed 64 bits for values near 2^63: fall back to
+        # Python ints only then
+        wide = top * self.block_size > 0xFFFFFFFFFFFFFFFF
+        self.sums = store.add_meta('sum', object if wide else np.uint64)
+        for b in range(store.nblocks):
+            self.sums[b] = exact_sum(store.data(b))
+        # nxt[b] leads (with path compression) to the first live block >= b;
+        # nblocks is the sentinel
+        nblocks = store.nblocks
+        self.nxt = array('q', range(nblocks + 1))
+        for b in np.flatnonzero(self.max <= 1).tolist():
+            self.nxt[b] = b + 1
+        # Optional block_stats.BlockStats instrumentation
+        self.stats = stats
+
+    def _find(self, b):
+        """Return the first live block with index >= b"""
+        nxt = self.nxt
+        root = b
+        while nxt[root] != root:
+            root = nxt[root]
+        while nxt[b] != root:
+            nxt[b], b = root, nxt[b]
+        return root
+
+    def _refresh(self, b):
+        """Recompute max[b] and unlink block b once it has converged"""
+        m = self.store.data(b).max()
+        self.max[b] = m
+        if self.stats is not None:
+            self.stats.rebuilds += 1
+        if m <= 1:
+            self.nxt[b] = b + 1
+
+    def _sqrt_partial(self, b, start, stop):
+        """Square-root a[start:stop] inside block b"""
+        if self.max[b] <= 1:
+            return
+        if self.stats is not None:
+            self.stats.touched += stop - start
+        base = b * self.block_size
+        seg = self.store.writable(b)[start - base:stop - base]
+        old = exact_sum(seg)
+        seg[:] = isqrt_u64(seg)
+        self.store.mark_dirty(b)
+        self.sums[b] = int(self.sums[b]) + exact_sum(seg) - old
+        self._refresh(b)
+
+    def _sqrt_whole(self, wl, wr):
+        """Square-root every live block in wl..wr (inclusive)"""
+        store = self.store
+        sums = self.sums
+        find = self._find
+        stats = self.stats
+        b = find(wl)
+        while b <= wr:
+            if stats is not None:
+                stats.whole += 1
+            seg = store.writable(b)
+            seg[:] = isqrt_u64(seg)
+            store.mark_dirty(b)
+            sums[b] = exact_sum(seg)
+            self._refresh(b)
+            b = find(b + 1)
+
+    def _sqrt(self, l, r):
+        """Apply a_i <- ⌊√a_i⌋ on 0-based [l, r]"""
+        B = self.block_size
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        if bl == br and wl > wr:
+            self._sqrt_partial(bl, l, r + 1)
+            return
+        if wl != bl:
+            self._sqrt_partial(bl, l, (bl + 1) * B)
+        if wr != br:
+            self._sqrt_partial(br, br * B, r + 1)
+        if wl <= wr:
+            self._sqrt_whole(wl, wr)
+
+    def _sum(self, l, r):
+        """Return the sum of a[l..r] (0-based, inclusive)"""
+        B = self.block_size
+        data = self.store.data
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        stats = self.stats
+        if bl == br and wl > wr:
+            if stats is not None:
+                stats.touched += r + 1 - l
+            return exact_sum(data(bl)[l - bl * B:r + 1 - bl * B])
+        if stats is not None:
+            stats.touched += (wl != bl) * ((bl + 1) * B - l) + (wr != br) * (r + 1 - br * B)
+            stats.whole += max(0, wr + 1 - wl)
+        total = 0
+        if wl != bl:
+            total += exact_sum(data(bl)[l - bl * B:])
+        if wr != br:
+            total += exact_sum(data(br)[:r + 1 - br * B])
+        if wl <= wr:
+            sums = self.sums[wl:wr + 1]
+            total += int(sums.sum()) if sums.dtype == object else exact_sum(sums)
+        return total
+
+    def sqrt_range(self, l, r):
+        """Apply a_i <- ⌊√a_i⌋ for l <= i <= r (1-based)"""
+        self._sqrt(l - 1, r - 1)
+
+    def range_sum(self, l, r):
+        """Return the sum of a_i for l <= i <= r (1-based)"""
+        return self._sum(l - 1, r - 1)
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays and return the
+        answers of the sum queries (opt 1) in order. c is ignored.
+        """
+        answers = []
+        sqrt = self._sqrt
+        total = self._sum
+        stats = self.stats
+        for o, lo, hi in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                             np.asarray(r).tolist()):
+            if o == 0:
+                sqrt(lo - 1, hi - 1)
+            else:
+                answers.append(total(lo - 1, hi - 1))
+            if stats is not None:
+                stats.end_op(o)
+        return answers
+
+    def to_array(self):
+        """Return the current values as a new array"""
+        self.store.flush()
+        return self.store.plane().astype(np.uint64)
+
+class Q3FenwickEngine:
+    """Range sqrt / range sum with a next-live-element union-find and a Fenwick tree"""
+
+    def __init__(self, values, block_size=None):
+        values = np.asarray(values, dtype=np.uint64)
+        self.a = array('Q', values.tobytes())
+        self.n = n = len(self.a)
+        # block_size is accepted for API compatibility with Q3BlockEngine
+        self.block_size = block_size
+        # Fenwick tree over 1-based positions, built in O(n); a flat uint64
+        # buffer unless the total can exceed 64 bits
+        tree = [0] + self.a.tolist()
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.tree = array('Q', tree) if exact_sum(values) <= 0xFFFFFFFFFFFFFFFF else tree
+        # nxt[i] leads (with path compression) to the first index >= i whose
+        # value is > 1; n is the sentinel
+        idx = np.arange(n + 1, dtype=np.int64)
+        idx[:n] += values <= 1
+        self.nxt = array('q', idx.tobytes())
+
+    def _find(self, i):
+        """Return the first index >= i whose value is still > 1"""
+        nxt = self.nxt
+        root = i
+        while nxt[root] != root:
+            root = nxt[root]
+        while nxt[i] != root:
+            nxt[i], i = root, nxt[i]
+        return root
+
+    def _prefix(self, i):
+        """Return a[0] + ... + a[i - 1]"""
+        tree = self.tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    def _sqrt(self, l, r):
+        """Apply a_i <- ⌊√a_i⌋ on 0-based [l, r]"""
+        a = self.a
+        tree = self.tree
+        nxt = self.nxt
+        n = self.n
+        find = self._find
+        isqrt = math.isqrt
+        i = find(l)
+        while i <= r:
+            v = a[i]
+            s = isqrt(v)
+            a[i] = s
+            delta = s - v
+            j = i + 1
+            while j <= n:
+                tree[j] += delta
+                j += j & -j
+            if s <= 1:
+                nxt[i] = i + 1
+            i = find(i + 1)
+
+    def _sum(self, l, r):
+        """Return the sum of a[l..r] (0-based, inclusive)"""
+        return self._prefix(r + 1) - self._prefix(l)
+
+    def sqrt_range(self, l, r):
+        """Apply a_i <- ⌊√a_i⌋ for l <= i <= r (1-based)"""
+        self._sqrt(l - 1, r - 1)
+
+    def range_sum(self, l, r):
+        """Return the sum of a_i for l <= i <= r (1-based)"""
+        return self._sum(l - 1, r - 1)
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays and return the
+        answers of the sum queries (opt 1) in order. c is ignored.
+        """
+        answers = []
+        sqrt = self._sqrt
+        total = self._sum
+        for o, lo, hi in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                             np.asarray(r).tolist()):
+            if o == 0:
+                sqrt(lo - 1, hi - 1)
+            else:
+                answers.append(total(lo - 1, hi - 1))
+        return answers
+
+    def to_array(self):
+        """Return the current values as a new array"""
+        return np.frombuffer(self.a, dtype=np.uint64).copy()
+
+def main():
+    """Solve a Q3 input file (or stdin) and print the sum query answers"""
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    values, opt, l, r, c = load_input(path, 3)
+    engine = Q3BlockEngine(values)
+    answers = engine.run(opt, l, r, c)
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Block-decomposition engine for Example 4 (Q4.md): range growth (M l r h) and
+range count of heights >= k (A l r k). Each block keeps an add[i] tag and a
+sorted copy sorted[i] of its values; a partial growth re-sorts the block's
+copy (one np.sort of B elements beats any NumPy-level merge of the untouched
+and updated runs, which needs a mask, two gathers and a scatter).
+"""
+
+import sys
+
+import numpy as np
+
+from block_common import default_block_size, load_input, whole_range
+from block_storage import BlockStorage, fit_dtype
+
+# Initial heights are natural numbers not exceeding this bound (Q4.md)
+MAX_HEIGHT = 1000
+
+def sort_blocks(a, block_size):
+    """Sort every block of a independently and return the block-aligned sorted copy"""
+    n = len(a)
+    pos = np.arange(n, dtype=np.int64)
+    blk = pos // block_size
+    if n and a.min() >= 0 and a.max() <= MAX_HEIGHT and blk[-1] <= 0xFFFF:
+        # Counting sort (LSD): a stable pass on the 16-bit heights, then a
+        # stable pass on the 16-bit block ids; NumPy radix-sorts both
+        perm = np.argsort(a.astype(np.uint16), kind='stable')
+        perm = perm[np.argsort(blk[perm].astype(np.uint16), kind='stable')]
+    else:
+        perm = np.lexsort((a, blk))
+    return a[perm]
+
+def count_range(store, add, l, r, k, count_whole, stats=None):
+    """
+    Count heights >= k on 0-based [l, r] of a Q4 block layout (heights are the
+    store's values plus the add tag of their block): end blocks element by
+    element, whole blocks wl..wr through count_whole(wl, wr, k). The count
+    kernel of the Q4 engines and of block_parallel's workers.
+    """
+    B = store.block_size
+    data = store.data
+    bl, br, wl, wr = whole_range(l, r, B, store.n)
+    if bl == br and wl > wr:
+        if stats is not None:
+            stats.touched += r + 1 - l
+        return int(np.count_nonzero(data(bl)[l - bl * B:r + 1 - bl * B] >= k - add[bl]))
+    if stats is not None:
+        stats.touched += (wl != bl) * ((bl + 1) * B - l) + (wr != br) * (r + 1 - br * B)
+        stats.whole += max(0, wr + 1 - wl)
+    total = 0
+    if wl != bl:
+        total += int(np.count_nonzero(data(bl)[l - bl * B:] >= k - add[bl]))
+    if wr != br:
+        total += int(np.count_nonzero(data(br)[:r + 1 - br * B] >= k - add[br]))
+    if wl <= wr:
+        total += count_whole(wl, wr, k)
+    return total
+
+def count_sorted(store, add, low, high, wl, wr, k):
+    """
+    Count heights >= k in whole blocks wl..wr by binary search in their sorted
+    copies; [low, high] bounds the stored heights.
+    """
+    data = store.data
+    # Keys of the plane's own dtype keep searchsorted off its slow
+    # conversion path; clamping to [low, high + 1] changes no count
+    keys = np.clip(k - add[wl:wr + 1], low, high + 1).astype(store.planes['sorted'].dtype)
+    found = 0
+    for b, key in zip(range(wl, wr + 1), keys):
+        found += data(b, 'sorted').searchsorted(key)
+    return min((wr + 1) * store.block_size, store.n) - wl * store.block_size - int(found)
+
+class _Q4Engine:
+    """
+    Shared skeleton of the Q4 engines: heights in a values plane plus per-block
+    add tags, with a sorted copy of every block. Subclasses keep their extra
+    per-block state in _rebuild(b) and answer whole blocks in _count_whole().
+    """
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        values = np.asarray(values, dtype=np.int64)
+        self.n = len(values)
+        self.block_size = block_size or default_block_size(self.n)
+        # storage: BlockStorage factory (n, block_size), e.g. a MappedBlockStorage
+        self.store = store = (storage or BlockStorage)(self.n, self.block_size)
+        self.sizes = store.sizes()
+        # [low, high] bounds every stored height; int32 until growth leaves it
+        # (count keys are clamped to [low, high + 1], which must fit as well)
+        self.low, self.high = (int(values.min()), int(values.max())) if self.n else (0, 0)
+        dtype = fit_dtype(self.low, self.high + 1)
+        self.a = store.add_plane('values', dtype)
+        self.a[:] = values
+        self.sorted = store.add_plane('sorted', dtype)
+        self.sorted[:] = sort_blocks(values, self.block_size)
+        # Heights are a[i] + add[block(i)]; sorted copies exclude the tag
+        self.add = store.add_meta('add', np.int64)
+        # Optional block_stats.BlockStats instrumentation
+        self.stats = stats
+
+    def _widen(self):
+        """Move the height planes to int64 once growth leaves int32"""
+        store = self.store
+        self.a = store.retype('values', np.int64)
+        self.sorted = store.retype('sorted', np.int64)
+
+    def _grow_partial(self, b, start, stop, h):
+        """Add h to a[start:stop] inside block b, re-sort its copy and rebuild the rest"""
+        store = self.store
+        base = b * self.block_size
+        if self.stats is not None:
+            self.stats.touched += stop - start
+        seg = store.writable(b)
+        seg[start - base:stop - base] += h
+        srt = store.writable(b, 'sorted')
+        srt[:] = seg
+        srt.sort()
+        store.mark_dirty(b)
+        store.mark_dirty(b, 'sorted')
+        self._rebuild(b)
+
+    def _rebuild(self, b):
+        """Rebuild block b's state after its sorted copy changed"""
+        raise NotImplementedError
+
+    def _grow(self, l, r, h):
+        """Add h to every height on 0-based [l, r]"""
+        B = self.block_size
+        # Stored heights and tags each grow by at most h
+        if h > 0:
+            self.high += h
+        else:
+            self.low += h
+        if self.a.dtype != np.int64 and not -2 ** 31 <= self.low <= self.high + 1 < 2 ** 31:
+            self._widen()
+        bl, br, wl, wr = whole_range(l, r, B, self.n)
+        if bl == br and wl > wr:
+            self._grow_partial(bl, l, r + 1, h)
+            return
+        if wl != bl:
+            self._grow_partial(bl, l, (bl + 1) * B, h)
+        if wr != br:
+            self._grow_partial(br, br * B, r + 1, h)
+        if wl <= wr:
+            self.add[wl:wr + 1] += h
+            if self.stats is not None:
+                self.stats.whole += wr + 1 - wl
+
+    def _count_whole(self, wl, wr, k):
+        """Count heights >= k in whole blocks wl..wr (inclusive)"""
+        raise NotImplementedError
+
+    def _count(self, l, r, k):
+        """Count heights >= k on 0-based [l, r]"""
+        return count_range(self.store, self.add, l, r, k, self._count_whole, self.stats)
+
+    def grow(self, l, r, h):
+        """Add h to every height a_i with l <= i <= r (1-based)"""
+        self._grow(l - 1, r - 1, h)
+
+    def count_at_least(self, l, r, k):
+        """Return how many a_i >= k for l <= i <= r (1-based)"""
+        return self._count(l - 1, r - 1, k)
+
+    def run(self, opt, l, r, c):
+        """
+        Replay a batch of operations given as columnar arrays (opt 0 = M,
+        opt 1 = A) and return the answers of the A queries in order.
+        """
+        answers = []
+        grow = self._grow
+        count = self._count
+        stats = self.stats
+        for o, lo, hi, x in zip(np.asarray(opt).tolist(), np.asarray(l).tolist(),
+                                np.asarray(r).tolist(), np.asarray(c).tolist()):
+            if o == 0:
+                grow(lo - 1, hi - 1, x)
+            else:
+                answers.append(count(lo - 1, hi - 1, x))
+            if stats is not None:
+                stats.end_op(o)
+        return answers
+
+    def to_array(self):
+        """Return the current heights as a new array"""
+        self.store.flush()
+        return self.store.plane() + np.repeat(self.add, self.sizes)
+
+class Q4BlockEngine(_Q4Engine):
+    """Range add / range count >= k over √n blocks with sorted block copies"""
+
+    def _rebuild(self, b):
+        if self.stats is not None:
+            self.stats.rebuilds += 1
+
+    def _count_whole(self, wl, wr, k):
+        """Count heights >= k in whole blocks wl..wr by binary search in their sorted copies"""
+        return count_sorted(self.store, self.add, self.low, self.high, wl, wr, k)
+
+class Q4ValueEngine(_Q4Engine):
+    """
+    Range add / range count >= k over √n blocks that are also blocked by value:
+    block i's stored heights fall into buckets of 2**shift[i] values from
+    base[i], and table[i][j] counts the heights >= base[i] + (j << shift[i]).
+    A whole-block count is one table lookup when k falls on a bucket boundary
+    (always, for unit buckets); otherwise the boundary bucket is binary-searched
+    in the block's sorted copy. A query gathers and searches all its whole
+    blocks at once. When growth spreads a block past its table, the tables
+    widen up to TABLE_BUDGET, then the block's buckets coarsen.
+    """
+
+    # Table entries allowed per element; blocks spreading wider get coarser buckets
+    TABLE_BUDGET = 4
+
+    def __init__(self, values, block_size=None, stats=None, storage=None):
+        super().__init__(values, block_size, stats, storage)
+        store = self.store
+        # Tables exclude the add tag, like the sorted copies
+        self.base = store.add_meta('base', np.int64)
+        self.shift = store.add_meta('shift', np.int64)
+        self.count_dtype = fit_dtype(0, self.block_size, (np.int16, np.int32))
+        self.max_width = max(16, self.TABLE_BUDGET * self.block_size)
+        values = self.a
+        starts = np.arange(0, self.n, self.block_size)
+        spread = int((np.maximum.reduceat(values, starts)
+                      - np.minimum.reduceat(values, starts)).max()) if self.n else 0
+        self.rows = np.arange(store.nblocks)
+        self._build_tables(spread + 1)
+
+    def _build_tables(self, width):
+        """(Re)build every block's table with at least the given width"""
+        width = min(1 << max(4, (width - 1).bit_length()), self.max_width)
+        self.width = width
+        store = self.store
+        nblocks = store.nblocks
+        self.store.flush()
+        a = store.plane()
+        starts = np.arange(0, self.n, self.block_size)
+        self.base[:] = np.minimum.reduceat(a, starts) if self.n else 0
+        spread = (np.maximum.reduceat(a, starts) if self.n else 0) - self.base
+        # Smallest bucket shift that fits each block's spread into the table
+        shift = np.zeros(nblocks, dtype=np.int64)
+        over = spread >= width
+        while over.any():
+            shift += over
+            over = (spread >> shift) >= width
+        self.shift[:] = shift
+        bucket = (a - np.repeat(self.base, self.sizes)) >> np.repeat(shift, self.sizes)
+        block = np.repeat(self.rows, self.sizes)
+        hist = np.bincount(block * (width + 1) + bucket,
+                           minlength=nblocks * (width + 1)).reshape(nblocks, width + 1)
+        # Suffix sums: table[i][j] = number of heights >= base[i] + (j << shift[i])
+        self.table = np.cumsum(hist[:, ::-1], axis=1)[:, ::-1].astype(self.count_dtype)
+        store.meta['table'] = self.table
+        if self.stats is not None:
+            self.stats.rebuilds += nblocks
+
+    def _rebuild(self, b):
+        """Rebuild block b's table row from its re-sorted copy, rebalancing if needed"""
+        store = self.store
+        vals = store.data(b)
+        srt = store.data(b, 'sorted')
+        lo = int(srt[0])
+        spread = int(srt[-1]) - lo
+        if spread >= self.width and self.width < self.max_width:
+            self._build_tables(spread + 1)
+            return
+        shift = 0
+        while spread >> shift >= self.width:
+            shift += 1
+        if self.stats is not None:
+            self.stats.rebuilds += 1
+        self.base[b] = lo
+        self.shift[b] = shift
+        hist = np.bincount(np.subtract(vals, lo, dtype=np.int64) >> shift, minlength=self.width + 1)
+        self.table[b] = np.cumsum(hist[::-1])[::-1]
+
+    def _count_whole(self, wl, wr, k):
+        """Count heights >= k in whole blocks wl..wr with one gather from their table rows"""
+        B = self.block_size
+        # One gather: each block's key as a bucket of its table row
+        key = k - self.add[wl:wr + 1]
+        shift = self.shift[wl:wr + 1]
+        offset = np.maximum(key - self.base[wl:wr + 1], 0)
+        col = np.minimum(offset >> shift, self.width)
+        table = self.table
+        total = int(table[self.rows[wl:wr + 1], col].sum(dtype=np.int64))
+        # A key inside a coarse bucket: the row also counted the bucket's
+        # heights below the key, found by one lockstep binary search
+        inner = np.flatnonzero(((offset & ((1 << shift) - 1)) != 0) & (col < self.width))
+        if len(inner):
+            blocks = inner + wl
+            j = col[inner]
+            end = blocks * B + self.sizes[blocks]
+            lo = end - table[blocks, j]
+            hi = end - table[blocks, j + 1]
+            first = lo.copy()
+            key = key[inner]
+            srt = self.store.plane('sorted')
+            live = np.flatnonzero(lo < hi)
+            while len(live):
+                mid = (lo[live] + hi[live]) >> 1
+                below = srt[mid] < key[live]
+                lo[live] = np.where(below, mid + 1, lo[live])
+                hi[live] = np.where(below, hi[live], mid)
+                live = live[lo[live] < hi[live]]
+            total -= int((lo - first).sum())
+        return total
+
+def main():
+    """Solve a Q4 input file (or stdin) and print the A query answers"""
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    values, opt, l, r, c = load_input(path, 4)
+    engine = Q4BlockEngine(values)
+    answers = engine.run(opt, l, r, c)
+    sys.stdout.write(''.join(f"{x}\n" for x in answers))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the block_input tokenizer: malformed integer tokens are rejected
+instead of being folded into wrong numbers.
+"""
+
+import re
+
+import numpy as np
+import pytest
+
+from block_input import parse_input, parse_ints
+
+def tokens(data):
+    """parse_ints over the whitespace-separated tokens of data"""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    spans = [(m.start(), m.end()) for m in re.finditer(rb'\S+', data)]
+    starts, ends = (np.array(col, dtype=np.int64) for col in zip(*spans))
+    return parse_ints(buf, starts, ends)
+
+def test_parse_ints_valid():
+    assert tokens(b"0 -7 42 9223372036854775807").tolist() == [0, -7, 42, 9223372036854775807]
+
+@pytest.mark.parametrize('data', [b"1 2x 3", b"1 - 3", b"1 --2", b"1 3- 4", b"+5", b"1.5"])
+def test_parse_ints_malformed(data):
+    with pytest.raises(ValueError, match="malformed"):
+        tokens(data)
+
+def test_parse_input_malformed():
+    with pytest.raises(ValueError, match="malformed"):
+        parse_input(b"3\n1 2 3\n1 1 2 O\n1 1 3 4\n2 1 3 0\n", 1)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Turn lecture .tex sources (block_lecture.tex) into slide specs for
+generate_pptx.py, so the deck is rebuilt from the LaTeX instead of being
+kept in sync by hand. One pass of a combined regex tokenizes the document
+body: every \\newpage page becomes a slide, \\section* / \\subsection* /
+\\subsubsection* become the slide title or bold headings, itemize and
+enumerate items become leveled bullets. TikZ pictures that read as text
+(two-column tables, chains of nodes joined by arrows) become bullets; other
+drawings are skipped.
+Inline and display math is translated to the Unicode forms the deck uses
+(a_1 -> a₁, \\sqrt{n} -> √n, \\leq -> ≤, \\lfloor -> ⌊) by
+math_translate.latex_to_unicode.
+"""
+
+import argparse
+import json
+import os
+import re
+
+from math_translate import latex_to_unicode
+
+# ---------- Document tokenizer ----------
+
+DOC_TOKENS = re.compile(r"""
+    (?P<comment>(?<!\\)%[^\n]*)
+  | \\begin\{tikzpicture\}(?:\[[^\]]*\])?(?P<tikz>.*?)\\end\{tikzpicture\}
+  | \\begin\{(?P<begin>[^}]*)\}(?:\[[^\]]*\])?
+  | \\end\{(?P<end>[^}]*)\}
+  | \\(?P<heading>section|subsection|subsubsection)\*?\{(?P<title>(?:[^{}]|\{[^{}]*\})*)\}
+  | (?P<item>\\item\b)
+  | (?P<newpage>\\newpage\b|\\clearpage\b)
+  | \\\[(?P<display>.*?)\\\]
+  | (?P<blank>\n[ \t]*(?:\n[ \t]*)+)
+  | (?P<text>[^\\%\n]+|\\[a-zA-Z]+\*?|\\.|\n)
+""", re.S | re.X)
+
+# Environments that never reach a slide
+SKIPPED = {'figure', 'table', 'tabular'}
+LISTS = {'itemize', 'enumerate'}
+
+# TikZ nodes: \node[options] at (x,y) {text}, text with up to two brace levels
+TIKZ_NODE = re.compile(r"""
+    \\node(?:\[(?P<options>[^\]]*)\])?\s*at\s*\(\s*(?P<x>[-\d.]+)\s*,\s*(?P<y>[-\d.]+)\s*\)\s*
+    \{(?P<text>(?:[^{}]|\{(?:[^{}]|\{[^{}]*\})*\})*)\}
+""", re.X)
+
+# Font sizes of headings and of bullets by level
+HEADING_SIZES = {'section': 24, 'subsection': 24, 'subsubsection': 22}
+LABEL_SIZE = 20
+LEVEL_SIZES = {0: 16, 1: 16, 2: 14}
+DEEP_SIZE = 13
+BLANK = ["", 0, 12]
+
+def tikz_lines(picture):
+    """
+    Text lines of a TikZ picture that reads as text, [] for a drawing.
+    A two-column table gives one "label：value" line per row below its header
+    row; a chain of nodes joined by arrows gives one "a → b → …" line, then
+    its captions. Pictures with loops or plots are drawings.
+    """
+    if '\\foreach' in picture or 'plot' in picture:
+        return []
+    nodes = [(float(m.group('x')), float(m.group('y')), m.group('options') or '',
+              latex_to_unicode(m.group('text'))) for m in TIKZ_NODE.finditer(picture)]
+    rows = {}
+    for x, y, _, text in nodes:
+        rows.setdefault(y, []).append((x, text))
+    if len({x for x, _, _, _ in nodes}) == 2 and all(len(row) == 2 for row in rows.values()):
+        table = [sorted(rows[y]) for y in sorted(rows, reverse=True)]
+        return [f"{left}：{right}" for (_, left), (_, right) in table[1:]]
+    chain = sorted((x, text) for x, _, options, text in nodes if not options)
+    captions = [text for _, _, options, text in nodes if options]
+    in_line = len({y for _, y, options, _ in nodes if not options}) == 1
+    if '->' in picture and len(chain) > 1 and in_line:
+        return [' → '.join(text for _, text in chain)] + captions
+    return []
+
+def _join_lines(lines):
+    """Join source lines: no space between CJK text, one space between Latin words"""
+    out = ''
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if out and out[-1].isascii() and line[0].isascii():
+            out += ' '
+        out += line
+    return out
+
+class _SlideBuilder:
+    """Collects paragraphs page by page while the tokenizer walks the document"""
+
+    def __init__(self, title):
+        self.sections = []
+        self.section = None
+        self.label = None
+        self.slide = {'layout': 'title', 'title': title} if title else None
+        self.lines = []
+        # Open lists: [kind, items so far]; continuation marks a second
+        # paragraph inside the current item
+        self.lists = []
+        self.continuation = False
+        # Heading waiting for its first paragraph; dropped if only a figure follows
+        self.pending = None
+
+    def _section(self, name):
+        self.section = {'name': name, 'slides': []}
+        self.sections.append(self.section)
+
+    def end_page(self):
+        self.flush()
+        self.pending = None
+        if self.slide is not None:
+            if self.section is None:
+                self._section('title' if self.slide.get('layout') == 'title' else 'slides')
+            self.section['slides'].append(self.slide)
+        self.slide = None
+
+    def _paragraphs(self):
+        if self.slide is None:
+            self.slide = {'title': self.label or '', 'paragraphs': []}
+        return self.slide.setdefault('paragraphs', [])
+
+    def add(self, text, level=0, size=None, bold=False):
+        paragraphs = self._paragraphs()
+        if self.pending is not None:
+            if paragraphs:
+                paragraphs.append(list(BLANK))
+            paragraphs.append(self.pending)
+            self.pending = None
+        size = size or LEVEL_SIZES.get(level, DEEP_SIZE)
+        paragraphs.append([text, level, size, True] if bold else [text, level, size])
+
+    def flush(self):
+        """Emit the buffered text as one paragraph"""
+        raw = _join_lines(self.lines)
+        self.lines = []
+        if not raw:
+            return
+        text = latex_to_unicode(raw)
+        if not text:
+            return
+        if self.lists:
+            kind, count = self.lists[-1]
+            level = len(self.lists) + self.continuation
+            if kind == 'enumerate' and not self.continuation:
+                text = f"{count}. {text}"
+            self.continuation = True
+            self.add(text, level)
+        elif raw.startswith('\\textbf') and text.endswith('：'):
+            self.add(text, 0, LABEL_SIZE)
+        else:
+            self.add(text)
+
+    def heading(self, kind, title):
+        self.flush()
+        text = latex_to_unicode(title)
+        if kind == 'section':
+            self._section(text)
+            self.label = text.split('：')[0]
+        if self.slide is None or self.slide.get('layout') == 'title':
+            if self.slide is not None:
+                self.end_page()
+            if kind != 'section' and self.label and not text.startswith(self.label):
+                text = f"{self.label}：{text}"
+            self.slide = {'title': text, 'paragraphs': []}
+            return
+        self.pending = [text, 0, HEADING_SIZES[kind], True]
+
+    def item(self):
+        self.flush()
+        if self.lists:
+            self.lists[-1][1] += 1
+        self.continuation = False
+
+    def figure(self, picture):
+        self.flush()
+        for text in tikz_lines(picture):
+            self.add(text, len(self.lists) + 1)
+
+    def display(self, math):
+        self.flush()
+        level = len(self.lists) + 1 if self.lists else 0
+        self.add(latex_to_unicode(math), level)
+
+    def begin_list(self, kind):
+        self.flush()
+        self.lists.append([kind, 0])
+        self.continuation = False
+
+    def end_list(self):
+        self.flush()
+        self.lists.pop()
+        self.continuation = bool(self.lists)
+
+    def blank(self):
+        self.flush()
+
+def tex_to_spec(source):
+    """Slide spec (as read by generate_pptx.load_spec) of a LaTeX document's text"""
+    title = re.search(r'\\title\{((?:[^{}]|\{[^{}]*\})*)\}', source)
+    body = source.split('\\begin{document}', 1)[-1].split('\\end{document}', 1)[0]
+    builder = _SlideBuilder(latex_to_unicode(title.group(1)) if title else None)
+    skipping = 0
+    for m in DOC_TOKENS.finditer(body):
+        kind = m.lastgroup
+        if kind == 'comment':
+            continue
+        if skipping:
+            if kind == 'begin' and m.group('begin') in SKIPPED:
+                skipping += 1
+            elif kind == 'end' and m.group('end') in SKIPPED:
+                skipping -= 1
+            continue
+        if kind == 'begin':
+            env = m.group('begin')
+            if env in SKIPPED:
+                skipping = 1
+            elif env in LISTS:
+                builder.begin_list(env)
+        elif kind == 'end':
+            if m.group('end') in LISTS:
+                builder.end_list()
+        elif kind == 'title':
+            builder.heading(m.group('heading'), m.group('title'))
+        elif kind == 'item':
+            builder.item()
+        elif kind == 'newpage':
+            builder.end_page()
+        elif kind == 'tikz':
+            builder.figure(m.group('tikz'))
+        elif kind == 'display':
+            builder.display(m.group('display'))
+        elif kind == 'blank':
+            builder.blank()
+        elif m.group(0) == '\n':
+            builder.lines.append('')
+        elif builder.lines:
+            builder.lines[-1] += m.group(0)
+        else:
+            builder.lines.append(m.group(0))
+    builder.end_page()
+    return {'sections': builder.sections}
+
+def spec_slides(spec):
+    """Slides of a spec in deck order (what generate_pptx.build_deck takes)"""
+    return [slide for section in spec['sections'] for slide in section['slides']]
+
+def main():
+    """Build a deck (or a JSON slide spec) from each .tex file given"""
+    # generate_pptx reads .tex sources through this module
+    from generate_pptx import build_deck
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sources', nargs='+', help='.tex files')
+    parser.add_argument('--json', action='store_true',
+                        help='write NAME_slides.json instead of NAME.pptx')
+    parser.add_argument('-d', '--output-dir', required=True,
+                        help='directory for the outputs (the official block_lecture.pptx '
+                             'is built by generate_pptx.py)')
+    parser.add_argument('--force', action='store_true',
+                        help='compile every slide instead of reusing unchanged ones')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for path in args.sources:
+        with open(path, encoding='utf-8') as f:
+            spec = tex_to_spec(f.read())
+        stem = os.path.splitext(os.path.basename(path))[0]
+        folder = args.output_dir
+        if args.json:
+            output_file = os.path.join(folder, f"{stem}_slides.json")
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(spec, f, ensure_ascii=False, indent=1)
+            print(f"{path}: {len(spec_slides(spec))} slides -> {output_file}")
+            continue
+        output_file = os.path.join(folder, f"{stem}.pptx")
+        compiled, copied = build_deck(spec_slides(spec), output_file, args.force)
+        print(f"{path}: {compiled + copied} slides ({compiled} compiled, {copied} reused) "
+              f"-> {output_file}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())